@@ -13,6 +13,8 @@ import time
 import signal
 import platform
 
+from benchmark_server import wait_for_server
+
 # Configuración
 THREADING_PORT = 8080
 FORKING_PORT = 8081
@@ -37,29 +39,36 @@ def start_servers():
     print(f"\nIniciando servidor Threading en puerto {THREADING_PORT}...")
     threading_proc = subprocess.Popen(
         [sys.executable, "http_server.py", str(THREADING_PORT), "threading"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        cwd=os.getcwd()
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        cwd=os.getcwd(),
+        start_new_session=True,
+        close_fds=True
     )
     processes.append(("Threading", threading_proc, THREADING_PORT))
-    time.sleep(0.5)
 
     # Servidor Forking (solo en Unix)
     if IS_UNIX_LIKE:
         print(f"Iniciando servidor Forking en puerto {FORKING_PORT}...")
         forking_proc = subprocess.Popen(
             [sys.executable, "http_server.py", str(FORKING_PORT), "forking"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            cwd=os.getcwd()
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            cwd=os.getcwd(),
+            start_new_session=True,
+            close_fds=True
         )
         processes.append(("Forking", forking_proc, FORKING_PORT))
-        time.sleep(0.5)
     else:
         print("\nADVERTENCIA: ForkingMixIn no disponible en este sistema.")
         print("Solo se ejecutará el servidor Threading.")
         print("Para comparar ambos modos, ejecuta en Linux/macOS o WSL.")
 
+    # Esperar a que ambos acepten conexiones (arrancan en paralelo)
+    for name, proc, port in processes:
+        if not wait_for_server(port, proc=proc):
+            print(f"ADVERTENCIA: el servidor {name} no respondió en el puerto {port}")
+
     return processes
 
 
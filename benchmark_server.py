@@ -4,6 +4,7 @@ Servidor de Benchmark - Ejecuta pruebas de rendimiento desde el backend
 y expone los resultados via API para el frontend.
 """
 
+import asyncio
 import socketserver
 import threading
 import subprocess
@@ -13,16 +14,54 @@ import json
 import os
 import sys
 import platform
-from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import re
+import stat
+import struct
+import errno
+from array import array
+from collections import Counter, defaultdict, deque
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qsl
+from concurrent.futures import ThreadPoolExecutor
+
+# Event loop alternativo (opcional) para el cliente asíncrono
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+# Estadísticas vectorizadas (opcional)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Serialización JSON en C (opcional)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 HOST = "0.0.0.0"
 BENCHMARK_PORT = 8082
 THREADING_PORT = 8080
 FORKING_PORT = 8081
 PUBLIC_DIR = "public"
+REQUEST_TIMEOUT = 5  # Segundos para recibir la petición antes de cerrar
+
+_PLATFORM = platform.system()
+IS_UNIX_LIKE = _PLATFORM in ['Linux', 'Darwin', 'FreeBSD', 'OpenBSD']
+
+
+def json_bytes(data):
+    """Serializa a JSON (bytes UTF-8) usando orjson si está disponible"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode("utf-8")
 
-IS_UNIX_LIKE = platform.system() in ['Linux', 'Darwin', 'FreeBSD', 'OpenBSD']
 
 # Resultados del último benchmark
 last_benchmark_results = {
@@ -31,63 +70,207 @@ last_benchmark_results = {
     "forking": None,
     "comparison": None
 }
+# Los mismos resultados ya serializados, para servirlos sin recodificar
+last_benchmark_results_json = json_bytes(last_benchmark_results)
 results_lock = threading.Lock()
 
+# Pool de conexiones persistentes (HTTP/1.1 keep-alive) por destino (host, port)
+_conn_pool = defaultdict(deque)
+_pool_lock = threading.Lock()
+
+# Última comprobación de disponibilidad por puerto: port -> (monotonic, disponible)
+AVAILABILITY_TTL = 1.0
+_availability_cache = {}
+_availability_lock = threading.Lock()
+
+# Archivos estáticos de la página de benchmark
+STATIC_CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".js": "application/javascript; charset=utf-8",
+}
+
+# Respuestas completas ya construidas por archivo: ruta -> (mtime_ns, bytes)
+_static_cache = {}
+_static_cache_lock = threading.Lock()
+
+CONTENT_LENGTH_RE = re.compile(rb"^content-length:[ \t]*(\d+)", re.IGNORECASE | re.MULTILINE)
+CONNECTION_CLOSE_RE = re.compile(rb"^connection:[ \t]*close", re.IGNORECASE | re.MULTILINE)
+
+# Buffer reutilizable donde se descartan los bodies de las respuestas
+_SCRATCH = memoryview(bytearray(65536))
+# En Linux, MSG_TRUNC sobre TCP descarta los bytes sin copiarlos al buffer
+_DISCARD_FLAGS = socket.MSG_TRUNC if _PLATFORM == "Linux" and hasattr(socket, "MSG_TRUNC") else 0
+
+# SO_LINGER {l_onoff=1, l_linger=0}: close() envía RST y el socket no pasa
+# por TIME_WAIT, así no se agotan los puertos efímeros en modo "close"
+_LINGER_RST = struct.pack("ii", 1, 0)
+
+# Error de puertos efímeros agotados y sugerencia que se muestra en la UI
+EADDRNOTAVAIL_ERROR = "Cannot assign requested address (EADDRNOTAVAIL)"
+EADDRNOTAVAIL_HINT = (
+    "Puertos efímeros agotados: amplía el rango con "
+    "'sysctl -w net.ipv4.ip_local_port_range=\"1024 65535\"' "
+    "o usa keep-alive"
+)
+
+
+def _get_conn(host, port, keep_alive=True):
+    """
+    Toma un socket del pool para (host, port) o crea uno nuevo.
+    Retorna (socket, reutilizado).
+    
+    Sin keep-alive el socket se cierra con RST (ver _LINGER_RST), por lo
+    que el modo "close" no mide el cierre ordenado de la conexión.
+    """
+    with _pool_lock:
+        pool = _conn_pool[(host, port)]
+        if pool:
+            return pool.pop(), True
+    
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if not keep_alive:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_RST)
+        sock.settimeout(60)
+        sock.connect((host, port))
+    except Exception:
+        sock.close()
+        raise
+    return sock, False
+
+
+def _put_conn(host, port, sock):
+    """Devuelve un socket al pool para reutilizarlo en la siguiente petición"""
+    with _pool_lock:
+        _conn_pool[(host, port)].append(sock)
+
+
+def close_pool(host, port):
+    """Cierra todas las conexiones persistentes hacia (host, port)"""
+    with _pool_lock:
+        pool = _conn_pool.pop((host, port), None)
+    while pool:
+        try:
+            pool.pop().close()
+        except OSError:
+            pass
+
+
+def _read_response(sock):
+    """
+    Lee una respuesta HTTP completa del socket.
+    
+    Usa Content-Length para saber dónde termina el body, de modo que la
+    conexión pueda reutilizarse. Si no hay Content-Length se lee hasta EOF.
+    
+    Returns:
+        (header_bytes, reutilizable)
+    """
+    response = bytearray()
+    while True:
+        header_end = response.find(b"\r\n\r\n")
+        if header_end != -1:
+            break
+        chunk = sock.recv(4096)
+        if not chunk:
+            raise ConnectionResetError("Connection closed before headers")
+        response += chunk
+    
+    headers = bytes(response[:header_end])
+    received = len(response) - (header_end + 4)
+    reusable = (
+        headers.startswith(b"HTTP/1.1")
+        and CONNECTION_CLOSE_RE.search(headers) is None
+    )
+    
+    match = CONTENT_LENGTH_RE.search(headers)
+    if match is None:
+        # Sin Content-Length el fin del body lo marca el cierre de conexión
+        while sock.recv_into(_SCRATCH, len(_SCRATCH), _DISCARD_FLAGS):
+            pass
+        return headers, False
+    
+    # Descartar exactamente el resto del body, sin acumularlo
+    remaining = int(match.group(1)) - received
+    while remaining > 0:
+        n = sock.recv_into(_SCRATCH, min(remaining, len(_SCRATCH)), _DISCARD_FLAGS)
+        if not n:
+            raise ConnectionResetError("Connection closed mid-body")
+        remaining -= n
+    
+    return headers, reusable
+
+
+def _build_request(host, port, path, keep_alive=True):
+    """Construye los bytes de una petición GET"""
+    connection = "keep-alive" if keep_alive else "close"
+    return f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: {connection}\r\n\r\n".encode("ascii")
+
 
-def make_http_request(host, port, path):
+def _describe_error(e):
+    """Traduce una excepción de red al texto que se agrupa en 'errors'"""
+    if isinstance(e, (socket.timeout, asyncio.TimeoutError)):
+        return "Timeout"
+    if isinstance(e, ConnectionRefusedError):
+        return "Connection refused"
+    if isinstance(e, asyncio.IncompleteReadError):
+        return "Connection closed mid-response"
+    if isinstance(e, ConnectionError):
+        return str(e) or type(e).__name__
+    if isinstance(e, OSError):
+        if e.errno == errno.EADDRNOTAVAIL:
+            return EADDRNOTAVAIL_ERROR
+        return f"OS Error: {e.errno}"
+    return str(e)
+
+
+def make_http_request(host, port, request, keep_alive=True):
     """
     Hace una petición HTTP raw usando sockets.
+    
+    Con keep_alive=True reutiliza conexiones persistentes del pool
+    (HTTP/1.1 keep-alive); con keep_alive=False abre una conexión
+    nueva por petición y envía Connection: close.
+    
+    'request' son los bytes ya construidos con _build_request, que se
+    reutilizan en todas las peticiones de una misma prueba.
+    
     Retorna el tiempo en segundos.
     """
     start_time = time.perf_counter()
     sock = None
     
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        sock.settimeout(60)
-        sock.connect((host, port))
-        
-        request = f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: close\r\n\r\n"
-        sock.sendall(request.encode())
-        
-        # Recibir solo el header para verificar éxito (más rápido)
-        response = b""
-        while b"\r\n\r\n" not in response:
-            chunk = sock.recv(4096)
-            if not chunk:
-                break
-            response += chunk
-        
-        # Consumir el resto del body
+        sock, reused = _get_conn(host, port, keep_alive)
         try:
-            while True:
-                chunk = sock.recv(65536)
-                if not chunk:
-                    break
-        except:
-            pass
+            sock.sendall(request)
+            headers, reusable = _read_response(sock)
+        except (ConnectionError, socket.timeout):
+            if not reused:
+                raise
+            # El servidor cerró la conexión del pool: reintentar con una nueva
+            sock.close()
+            sock, reused = _get_conn(host, port, keep_alive)
+            sock.sendall(request)
+            headers, reusable = _read_response(sock)
         
         elapsed = time.perf_counter() - start_time
         
+        if keep_alive and reusable:
+            _put_conn(host, port, sock)
+            sock = None
+        
         # Verificar que fue exitosa (200 OK)
-        if b"200 OK" in response[:100]:
+        if b"200 OK" in headers[:100]:
             return {"success": True, "time": elapsed}
         else:
-            return {"success": False, "time": elapsed, "error": f"Non-200: {response[:50]}"}
+            return {"success": False, "time": elapsed, "error": f"Non-200: {headers[:50]}"}
             
-    except socket.timeout:
-        elapsed = time.perf_counter() - start_time
-        return {"success": False, "time": elapsed, "error": "Timeout"}
-    except ConnectionRefusedError:
-        elapsed = time.perf_counter() - start_time
-        return {"success": False, "time": elapsed, "error": "Connection refused"}
-    except OSError as e:
-        elapsed = time.perf_counter() - start_time
-        return {"success": False, "time": elapsed, "error": f"OS Error: {e.errno}"}
     except Exception as e:
         elapsed = time.perf_counter() - start_time
-        return {"success": False, "time": elapsed, "error": str(e)}
+        return {"success": False, "time": elapsed, "error": _describe_error(e)}
     finally:
         if sock:
             try:
@@ -96,7 +279,302 @@ def make_http_request(host, port, path):
                 pass
 
 
-def run_benchmark_test(port, file_path, num_requests, parallel=True):
+def run_pipelined_sequential(host, port, request, num_requests):
+    """
+    Modo secuencial de latencia: una sola conexión persistente y cada
+    petición se envía en cuanto se termina de leer la respuesta anterior.
+    
+    El tiempo de cada respuesta se mide desde el envío hasta el primer
+    byte recibido (MSG_PEEK no lo consume), en nanosegundos. Así se aísla
+    el tiempo de proceso del servidor del handshake TCP: si el servidor
+    cierra la conexión, la reconexión queda fuera de la medición.
+    
+    Returns:
+        (tiempos en ns como array('q'), Counter de errores)
+    """
+    times_ns = array("q")
+    errors = Counter()
+    sock = None
+    
+    try:
+        for _ in range(num_requests):
+            try:
+                if sock is None:
+                    sock, _reused = _get_conn(host, port)
+                
+                start = time.perf_counter_ns()
+                sock.sendall(request)
+                if not sock.recv(1, socket.MSG_PEEK):
+                    raise ConnectionResetError("Connection closed before headers")
+                elapsed = time.perf_counter_ns() - start
+                
+                headers, reusable = _read_response(sock)
+                if not reusable:
+                    sock.close()
+                    sock = None
+                
+                if b"200 OK" in headers[:100]:
+                    times_ns.append(elapsed)
+                else:
+                    errors[f"Non-200: {headers[:50]}"] += 1
+            
+            except Exception as e:
+                errors[_describe_error(e)] += 1
+                if sock is not None:
+                    sock.close()
+                    sock = None
+    finally:
+        if sock is not None:
+            sock.close()
+    
+    return times_ns, errors
+
+
+async def _async_read_response(reader):
+    """
+    Versión asyncio de _read_response.
+    
+    El body se descarta en bloques para no retener archivos grandes
+    en memoria cuando hay muchas peticiones simultáneas.
+    """
+    headers = await reader.readuntil(b"\r\n\r\n")
+    reusable = (
+        headers.startswith(b"HTTP/1.1")
+        and CONNECTION_CLOSE_RE.search(headers) is None
+    )
+    
+    match = CONTENT_LENGTH_RE.search(headers)
+    if match is None:
+        while await reader.read(65536):
+            pass
+        return headers, False
+    
+    remaining = int(match.group(1))
+    while remaining > 0:
+        chunk = await reader.read(min(remaining, 65536))
+        if not chunk:
+            raise ConnectionResetError("Connection closed mid-body")
+        remaining -= len(chunk)
+    
+    return headers, reusable
+
+
+async def _async_connect(host, port, keep_alive=True):
+    """Abre una conexión asyncio; sin keep-alive se cerrará con RST"""
+    conn = await asyncio.wait_for(asyncio.open_connection(host, port), 60)
+    if not keep_alive:
+        conn[1].get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_RST)
+    return conn
+
+
+async def _async_request(host, port, request, keep_alive, sem, idle):
+    """
+    Hace una petición usando asyncio.
+    
+    El semáforo limita las conexiones simultáneas; 'idle' guarda las
+    conexiones keep-alive libres para reutilizarlas.
+    """
+    loop = asyncio.get_running_loop()
+    
+    async with sem:
+        start_time = loop.time()
+        conn = None
+        
+        try:
+            if idle:
+                conn, reused = idle.pop(), True
+            else:
+                conn = await _async_connect(host, port, keep_alive)
+                reused = False
+            
+            try:
+                reader, writer = conn
+                writer.write(request)
+                await writer.drain()
+                headers, reusable = await asyncio.wait_for(_async_read_response(reader), 60)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                if not reused:
+                    raise
+                # El servidor cerró la conexión libre: reintentar con una nueva
+                conn[1].close()
+                conn = await _async_connect(host, port, keep_alive)
+                reader, writer = conn
+                writer.write(request)
+                await writer.drain()
+                headers, reusable = await asyncio.wait_for(_async_read_response(reader), 60)
+            
+            elapsed = loop.time() - start_time
+            
+            if keep_alive and reusable:
+                idle.append(conn)
+                conn = None
+            
+            if b"200 OK" in headers[:100]:
+                return {"success": True, "time": elapsed}
+            else:
+                return {"success": False, "time": elapsed, "error": f"Non-200: {headers[:50]}"}
+        
+        except Exception as e:
+            elapsed = loop.time() - start_time
+            return {"success": False, "time": elapsed, "error": _describe_error(e)}
+        finally:
+            if conn:
+                conn[1].close()
+
+
+async def _gather_requests(host, port, request, num_requests, max_workers, keep_alive):
+    """Lanza num_requests peticiones con como máximo max_workers simultáneas"""
+    sem = asyncio.Semaphore(max_workers)
+    idle = []
+    
+    try:
+        return await asyncio.gather(
+            *(_async_request(host, port, request, keep_alive, sem, idle) for _ in range(num_requests)),
+            return_exceptions=True
+        )
+    finally:
+        for _, writer in idle:
+            writer.close()
+
+
+async def _async_pipeline_worker(host, port, request, count, depth, results):
+    """
+    Envía 'count' peticiones por una conexión keep-alive usando pipelining:
+    manda hasta 'depth' peticiones seguidas y luego lee las respuestas en orden.
+    
+    El tiempo de cada respuesta se mide desde el envío del lote. Si el
+    servidor cierra la conexión a mitad de lote, las peticiones sin
+    respuesta se reenvían por una conexión nueva; si no soporta
+    pipelining se continúa con lotes de una petición.
+    """
+    loop = asyncio.get_running_loop()
+    conn = None
+    remaining = count
+    
+    try:
+        while remaining > 0:
+            batch = min(depth, remaining)
+            answered = 0
+            send_start = loop.time()
+            reused = conn is not None
+            
+            try:
+                if conn is None:
+                    conn = await _async_connect(host, port)
+                reader, writer = conn
+                
+                writer.write(request * batch)
+                await writer.drain()
+                
+                while answered < batch:
+                    headers, reusable = await asyncio.wait_for(_async_read_response(reader), 60)
+                    elapsed = loop.time() - send_start
+                    answered += 1
+                    
+                    if b"200 OK" in headers[:100]:
+                        results.append({"success": True, "time": elapsed})
+                    else:
+                        results.append({"success": False, "time": elapsed, "error": f"Non-200: {headers[:50]}"})
+                    
+                    if not reusable:
+                        # El servidor no mantiene la conexión: no hay pipelining posible
+                        depth = 1
+                        conn[1].close()
+                        conn = None
+                        break
+            
+            except Exception as e:
+                if conn is not None:
+                    conn[1].close()
+                    conn = None
+                if reused and isinstance(e, (ConnectionError, asyncio.IncompleteReadError)):
+                    # El servidor cerró la conexión reutilizada: reenviar las
+                    # peticiones sin respuesta por una conexión nueva
+                    remaining -= answered
+                    continue
+                if answered == 0:
+                    if batch > 1:
+                        # Reintentar sin pipelining antes de contar un error
+                        depth = 1
+                        continue
+                    results.append({"success": False, "time": loop.time() - send_start, "error": _describe_error(e)})
+                    answered = 1
+            
+            remaining -= answered
+    finally:
+        if conn is not None:
+            conn[1].close()
+
+
+async def _gather_pipelined(host, port, request, num_requests, max_workers, depth):
+    """Reparte num_requests entre max_workers conexiones con pipelining"""
+    results = []
+    workers = max(1, min(max_workers, -(-num_requests // depth)))
+    counts = [num_requests // workers + (1 if i < num_requests % workers else 0) for i in range(workers)]
+    
+    await asyncio.gather(*(
+        _async_pipeline_worker(host, port, request, count, depth, results)
+        for count in counts
+    ))
+    return results
+
+
+def run_async(coro):
+    """
+    Ejecuta una corrutina en un event loop nuevo, propio del hilo que llama.
+    
+    Usa uvloop (libuv) cuando está instalado; si no, el loop por defecto
+    de asyncio (epoll/kqueue/IOCP según el sistema).
+    """
+    loop = uvloop.new_event_loop() if UVLOOP_AVAILABLE else asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+
+def _percentile(sorted_times, q):
+    """Percentil con interpolación lineal (mismo criterio que numpy.percentile)"""
+    position = (len(sorted_times) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_times) - 1)
+    return sorted_times[lower] + (sorted_times[upper] - sorted_times[lower]) * (position - lower)
+
+
+def summarize_times(times):
+    """
+    Calcula avg/min/max y percentiles 50/95/99 de una serie de tiempos.
+    
+    Usa NumPy si está instalado; si no, una versión en Python puro.
+    """
+    if not times:
+        return {"avg": 0, "min": 0, "max": 0, "p50": 0, "p95": 0, "p99": 0}
+    
+    if NUMPY_AVAILABLE:
+        values = np.frombuffer(times, dtype=np.float64)
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        return {
+            "avg": float(values.mean()),
+            "min": float(values.min()),
+            "max": float(values.max()),
+            "p50": float(p50),
+            "p95": float(p95),
+            "p99": float(p99),
+        }
+    
+    ordered = sorted(times)
+    return {
+        "avg": sum(ordered) / len(ordered),
+        "min": ordered[0],
+        "max": ordered[-1],
+        "p50": _percentile(ordered, 50),
+        "p95": _percentile(ordered, 95),
+        "p99": _percentile(ordered, 99),
+    }
+
+
+def run_benchmark_test(port, file_path, num_requests, parallel=True, keep_alive=True, pipeline=0):
     """
     Ejecuta un benchmark contra un servidor.
     
@@ -105,103 +583,191 @@ def run_benchmark_test(port, file_path, num_requests, parallel=True):
         file_path: Ruta del archivo a solicitar
         num_requests: Número de peticiones
         parallel: Si True, ejecuta en paralelo; si False, secuencial
+        keep_alive: Si True, reutiliza conexiones; si False, Connection: close
+        pipeline: Peticiones por lote con HTTP pipelining (0 = desactivado;
+                  implica keep-alive). En modo secuencial activa el modo
+                  pipelined_sequential (latencia hasta el primer byte)
     
     Returns:
         dict con resultados del benchmark
     """
-    results = []
-    errors = {}
+    times = array("d")
+    errors = Counter()
     start_total = time.perf_counter()
     
     # Limitar workers para no saturar el sistema
     max_workers = min(num_requests, 100)  # Máximo 100 conexiones simultáneas
     
-    if parallel:
-        # Ejecutar peticiones en paralelo usando ThreadPoolExecutor
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [
-                executor.submit(make_http_request, "127.0.0.1", port, file_path)
-                for _ in range(num_requests)
-            ]
-            
-            for future in as_completed(futures):
-                result = future.result()
-                results.append(result)
-                
-                # Contar errores
-                if not result["success"]:
-                    err = result.get("error", "Unknown")
-                    errors[err] = errors.get(err, 0) + 1
+    # La petición es idéntica en toda la prueba: se codifica una sola vez
+    pipelined = pipeline > 1
+    request = _build_request("127.0.0.1", port, file_path, keep_alive or pipelined)
+    
+    if pipelined and not parallel:
+        # Una conexión, latencia envío -> primer byte (ver run_pipelined_sequential)
+        times_ns, errors = run_pipelined_sequential("127.0.0.1", port, request, num_requests)
+        times = array("d", (t / 1e9 for t in times_ns))
+        results = ()
+    elif pipelined:
+        # Lotes de peticiones encadenadas por conexión (HTTP pipelining)
+        results = run_async(
+            _gather_pipelined("127.0.0.1", port, request, num_requests, max_workers, pipeline)
+        )
+    elif parallel:
+        # Ejecutar peticiones en paralelo en un event loop (un solo hilo)
+        results = run_async(
+            _gather_requests("127.0.0.1", port, request, num_requests, max_workers, keep_alive)
+        )
     else:
         # Ejecutar peticiones secuencialmente
-        for i in range(num_requests):
-            result = make_http_request("127.0.0.1", port, file_path)
-            results.append(result)
-            
-            if not result["success"]:
-                err = result.get("error", "Unknown")
-                errors[err] = errors.get(err, 0) + 1
+        results = [
+            make_http_request("127.0.0.1", port, request, keep_alive)
+            for _ in range(num_requests)
+        ]
     
     total_time = time.perf_counter() - start_total
+    close_pool("127.0.0.1", port)
+    
+    # Separar tiempos exitosos y contar errores
+    for result in results:
+        if isinstance(result, BaseException):
+            errors[_describe_error(result)] += 1
+        elif result["success"]:
+            times.append(result["time"])
+        else:
+            errors[result.get("error", "Unknown")] += 1
     
     # Calcular estadísticas
-    successful = [r for r in results if r["success"]]
-    failed = [r for r in results if not r["success"]]
-    
-    if successful:
-        times = [r["time"] for r in successful]
-        avg_time = sum(times) / len(times)
-        min_time = min(times)
-        max_time = max(times)
-    else:
-        avg_time = min_time = max_time = 0
+    stats = summarize_times(times)
+    successful = len(times)
     
     # Log de errores si hay
     if errors:
-        print(f"  Errores encontrados: {errors}")
+        print(f"  Errores encontrados: {dict(errors)}")
     
     return {
         "total_requests": num_requests,
-        "successful": len(successful),
-        "failed": len(failed),
+        "successful": successful,
+        "failed": num_requests - successful,
         "total_time": round(total_time, 4),
-        "avg_time": round(avg_time, 4),
-        "min_time": round(min_time, 4),
-        "max_time": round(max_time, 4),
-        "requests_per_second": round(len(successful) / total_time, 2) if total_time > 0 and len(successful) > 0 else 0,
-        "errors": errors if errors else None
+        "avg_time": round(stats["avg"], 4),
+        "min_time": round(stats["min"], 4),
+        "max_time": round(stats["max"], 4),
+        "p50_time": round(stats["p50"], 4),
+        "p95_time": round(stats["p95"], 4),
+        "p99_time": round(stats["p99"], 4),
+        "requests_per_second": round(successful / total_time, 2) if total_time > 0 and successful > 0 else 0,
+        "errors": dict(errors) if errors else None,
+        "hint": EADDRNOTAVAIL_HINT if EADDRNOTAVAIL_ERROR in errors else None
     }
 
 
 def check_server_available(port):
-    """Verifica si un servidor está disponible"""
+    """
+    Verifica si un servidor está disponible.
+    
+    El resultado se cachea AVAILABILITY_TTL segundos por puerto, porque la
+    página consulta el estado de forma periódica.
+    """
+    with _availability_lock:
+        cached = _availability_cache.get(port)
+    if cached is not None and time.monotonic() - cached[0] < AVAILABILITY_TTL:
+        return cached[1]
+    
     try:
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # Cerrar con RST en lugar de FIN: la sonda no deja el puerto en TIME_WAIT
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_RST)
         sock.settimeout(2)
         result = sock.connect_ex(("127.0.0.1", port))
         sock.close()
-        return result == 0
+        available = result == 0
     except:
-        return False
+        available = False
+    
+    with _availability_lock:
+        _availability_cache[port] = (time.monotonic(), available)
+    return available
 
 
-def run_full_benchmark(file_path, num_requests, parallel=True):
+def wait_for_server(port, timeout=5.0, proc=None):
+    """
+    Espera a que un servidor acepte conexiones en el puerto.
+    
+    Reintenta con backoff exponencial y retorna True en cuanto el puerto
+    responde, o False si se agota el timeout o el proceso 'proc' termina.
+    """
+    deadline = time.monotonic() + timeout
+    delay = 0.01
+    
+    while True:
+        try:
+            sock = socket.create_connection(("127.0.0.1", port), timeout=0.05)
+        except OSError:
+            if proc is not None and proc.poll() is not None:
+                return False
+            if time.monotonic() + delay > deadline:
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+        else:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_RST)
+            sock.close()
+            return True
+
+
+def split_cpu_affinity():
+    """
+    Reparte los CPUs disponibles: la primera mitad para el cliente de
+    benchmark y la otra mitad para los servidores, para que no compitan
+    por los mismos núcleos.
+    
+    Retorna (cpus_cliente, cpus_servidores), o None si el sistema no
+    soporta afinidad de CPU o hay menos de 2 CPUs.
+    """
+    if not hasattr(os, "sched_getaffinity"):
+        return None
+    
+    cpus = sorted(os.sched_getaffinity(0))
+    if len(cpus) < 2:
+        return None
+    
+    half = len(cpus) // 2
+    return cpus[:half], cpus[half:]
+
+
+def pin_server_process(pid, cpus):
+    """
+    Fija un proceso servidor a 'cpus' (los hijos de forking heredan la
+    afinidad) y, si se ejecuta como root, le sube la prioridad (nice -5).
+    """
+    try:
+        os.sched_setaffinity(pid, cpus)
+        if os.geteuid() == 0:
+            os.setpriority(os.PRIO_PROCESS, pid, -5)
+    except OSError as e:
+        print(f"No se pudo ajustar la afinidad del proceso {pid}: {e}")
+
+
+def run_full_benchmark(file_path, num_requests, parallel=True, keep_alive=True, pipeline=0):
     """
     Ejecuta benchmark completo en ambos servidores.
     """
-    global last_benchmark_results
+    global last_benchmark_results, last_benchmark_results_json
     
     with results_lock:
         last_benchmark_results["status"] = "running"
         last_benchmark_results["threading"] = None
         last_benchmark_results["forking"] = None
         last_benchmark_results["comparison"] = None
+        last_benchmark_results_json = json_bytes(last_benchmark_results)
     
     results = {
         "file": file_path,
         "requests": num_requests,
         "parallel": parallel,
-        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+        "keep_alive": keep_alive,
+        "pipeline": pipeline,
+        "timestamp": datetime.now().isoformat(sep=" ", timespec="seconds")
     }
     
     # Verificar disponibilidad de servidores
@@ -209,29 +775,40 @@ def run_full_benchmark(file_path, num_requests, parallel=True):
     forking_available = check_server_available(FORKING_PORT)
     
     print(f"\n{'='*60}")
-    print(f"BENCHMARK: {num_requests} peticiones {'paralelas' if parallel else 'secuenciales'}")
+    print(f"BENCHMARK: {num_requests} peticiones {'paralelas' if parallel else 'secuenciales'} ({'keep-alive' if keep_alive else 'close'})")
     print(f"Archivo: {file_path}")
     print(f"{'='*60}")
     
-    # Benchmark Threading
-    if threading_available:
-        print(f"\n[Threading] Ejecutando {num_requests} peticiones...")
-        threading_results = run_benchmark_test(THREADING_PORT, file_path, num_requests, parallel)
-        results["threading"] = threading_results
-        print(f"[Threading] Completado: {threading_results['avg_time']:.4f}s promedio, {threading_results['requests_per_second']} req/s")
-    else:
-        print("[Threading] Servidor no disponible")
-        results["threading"] = {"error": "Server not available"}
-    
-    # Benchmark Forking
-    if forking_available:
-        print(f"\n[Forking] Ejecutando {num_requests} peticiones...")
-        forking_results = run_benchmark_test(FORKING_PORT, file_path, num_requests, parallel)
-        results["forking"] = forking_results
-        print(f"[Forking] Completado: {forking_results['avg_time']:.4f}s promedio, {forking_results['requests_per_second']} req/s")
-    else:
-        print("[Forking] Servidor no disponible")
-        results["forking"] = {"error": "Server not available"}
+    # Ambos servidores se miden a la vez (puertos distintos, sin estado
+    # compartido) para que corran bajo la misma carga del sistema
+    servers = [
+        ("threading", "Threading", THREADING_PORT, threading_available),
+        ("forking", "Forking", FORKING_PORT, forking_available),
+    ]
+    bench_start = time.perf_counter()
+    
+    def timed_test(label, port):
+        start_offset = time.perf_counter() - bench_start
+        print(f"\n[{label}] Ejecutando {num_requests} peticiones...")
+        test_results = run_benchmark_test(port, file_path, num_requests, parallel, keep_alive, pipeline)
+        # Desfase de inicio respecto al benchmark, para verificar el solapamiento
+        test_results["start_offset"] = round(start_offset, 4)
+        print(f"[{label}] Completado: {test_results['avg_time']:.4f}s promedio, {test_results['requests_per_second']} req/s")
+        return test_results
+    
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = {
+            key: executor.submit(timed_test, label, port)
+            for key, label, port, available in servers
+            if available
+        }
+    
+    for key, label, port, available in servers:
+        if available:
+            results[key] = futures[key].result()
+        else:
+            print(f"[{label}] Servidor no disponible")
+            results[key] = {"error": "Server not available"}
     
     # Comparación
     if threading_available and forking_available:
@@ -262,6 +839,7 @@ def run_full_benchmark(file_path, num_requests, parallel=True):
             "status": "completed",
             **results
         }
+        last_benchmark_results_json = json_bytes(last_benchmark_results)
     
     return results
 
@@ -269,31 +847,41 @@ def run_full_benchmark(file_path, num_requests, parallel=True):
 class BenchmarkRequestHandler(socketserver.BaseRequestHandler):
     """Handler para el servidor de benchmark"""
     
+    def setup(self):
+        # Desactivar Nagle: las respuestas JSON pequeñas salen sin esperar ACK
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    
     def handle(self):
         try:
-            data = self.request.recv(4096).decode("utf-8")
+            # Un cliente que conecta y no envía nada (p. ej. una preconexión
+            # del navegador) no retiene un hilo del pool indefinidamente
+            self.request.settimeout(REQUEST_TIMEOUT)
+            try:
+                data = self.request.recv(4096)
+            except socket.timeout:
+                return
             if not data:
                 return
             
-            lines = data.split("\r\n")
-            request_line = lines[0].split()
+            # Solo se parsea la línea de petición; los headers no se usan
+            eol = data.find(b"\r\n")
+            request_line = (data[:eol] if eol != -1 else data).split(b" ", 2)
             
             if len(request_line) < 2:
                 self.send_response(400, "Bad Request")
                 return
             
-            method, path = request_line[0], request_line[1]
+            method = request_line[0]
+            try:
+                url = urlsplit(request_line[1].decode("ascii"))
+            except UnicodeDecodeError:
+                self.send_response(400, "Bad Request")
+                return
             
-            # Parsear query string
-            query_params = {}
-            if "?" in path:
-                path, query_string = path.split("?", 1)
-                for param in query_string.split("&"):
-                    if "=" in param:
-                        key, value = param.split("=", 1)
-                        query_params[key] = value
+            path = url.path
+            query_params = dict(parse_qsl(url.query))
             
-            if method == "GET":
+            if method == b"GET":
                 self.handle_get(path, query_params)
             else:
                 self.send_response(405, "Method Not Allowed")
@@ -318,23 +906,23 @@ class BenchmarkRequestHandler(socketserver.BaseRequestHandler):
     
     def run_benchmark_endpoint(self, params):
         """Endpoint para ejecutar benchmark"""
-        from urllib.parse import unquote
-        
+        # parse_qsl ya decodificó el URL encoding (%2F -> /)
         file_path = params.get("file", "/pdf/file-example_PDF_1MB.pdf")
-        # Decodificar URL encoding (%2F -> /)
-        file_path = unquote(file_path)
         
         num_requests = int(params.get("requests", "10"))
         parallel = params.get("parallel", "true").lower() == "true"
+        keep_alive = params.get("keepalive", "true").lower() == "true"
+        pipeline = int(params.get("pipeline", "0"))
         process_image = params.get("process", "false").lower() == "true"
         
         # Si se solicita procesamiento de imagen, agregar query param
+        # (sin la caché de resultados, para medir el procesamiento real)
         if process_image:
-            file_path = file_path + "?process=true"
+            file_path = file_path + "?process=true&cache=false"
         
         # Ejecutar benchmark en un thread separado para no bloquear
         def run_async():
-            run_full_benchmark(file_path, num_requests, parallel)
+            run_full_benchmark(file_path, num_requests, parallel, keep_alive, pipeline)
         
         thread = threading.Thread(target=run_async)
         thread.start()
@@ -344,6 +932,8 @@ class BenchmarkRequestHandler(socketserver.BaseRequestHandler):
             "file": file_path,
             "requests": num_requests,
             "parallel": parallel,
+            "keep_alive": keep_alive,
+            "pipeline": pipeline,
             "process_image": process_image
         }
         self.send_json(response_data)
@@ -351,7 +941,8 @@ class BenchmarkRequestHandler(socketserver.BaseRequestHandler):
     def get_results_endpoint(self):
         """Endpoint para obtener resultados"""
         with results_lock:
-            self.send_json(last_benchmark_results)
+            content = last_benchmark_results_json
+        self.send_json_bytes(content)
     
     def get_status_endpoint(self):
         """Endpoint para verificar estado de servidores"""
@@ -359,31 +950,43 @@ class BenchmarkRequestHandler(socketserver.BaseRequestHandler):
             "benchmark_server": True,
             "threading_server": check_server_available(THREADING_PORT),
             "forking_server": check_server_available(FORKING_PORT),
-            "platform": platform.system(),
-            "forking_supported": IS_UNIX_LIKE
+            "platform": _PLATFORM,
+            "forking_supported": IS_UNIX_LIKE,
+            "uvloop": UVLOOP_AVAILABLE
         }
         self.send_json(status)
     
     def serve_file(self, path):
-        """Sirve archivos estáticos"""
-        file_path = Path(PUBLIC_DIR + path)
+        """
+        Sirve archivos estáticos.
         
-        if not file_path.exists() or not file_path.is_file():
+        La respuesta completa (headers + body) se cachea por archivo y se
+        invalida cuando cambia su mtime, así las peticiones repetidas de la
+        página de benchmark se resuelven con un solo sendall.
+        """
+        file_path = PUBLIC_DIR + path
+        
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            st = None
+        
+        if st is None or not stat.S_ISREG(st.st_mode):
             self.send_response(404, "Not Found")
             return
         
-        content_types = {
-            ".html": "text/html; charset=utf-8",
-            ".css": "text/css; charset=utf-8",
-            ".js": "application/javascript; charset=utf-8",
-        }
+        cached = _static_cache.get(file_path)
+        if cached is not None and cached[0] == st.st_mtime_ns:
+            self.request.sendall(cached[1])
+            return
         
-        content_type = content_types.get(file_path.suffix, "application/octet-stream")
+        extension = os.path.splitext(file_path)[1]
+        content_type = STATIC_CONTENT_TYPES.get(extension, "application/octet-stream")
         
         with open(file_path, "rb") as f:
             content = f.read()
         
-        response = (
+        header = (
             "HTTP/1.1 200 OK\r\n"
             f"Content-Type: {content_type}\r\n"
             f"Content-Length: {len(content)}\r\n"
@@ -391,37 +994,63 @@ class BenchmarkRequestHandler(socketserver.BaseRequestHandler):
             "Connection: close\r\n"
             "\r\n"
         )
-        self.request.sendall(response.encode("utf-8") + content)
+        response = header.encode("utf-8") + content
+        
+        with _static_cache_lock:
+            _static_cache[file_path] = (st.st_mtime_ns, response)
+        
+        self.request.sendall(response)
     
     def send_json(self, data):
         """Envía respuesta JSON"""
-        content = json.dumps(data, indent=2)
-        response = (
+        self.send_json_bytes(json_bytes(data))
+    
+    def send_json_bytes(self, content):
+        """Envía un JSON ya serializado (bytes)"""
+        header = (
             "HTTP/1.1 200 OK\r\n"
             "Content-Type: application/json; charset=utf-8\r\n"
             f"Content-Length: {len(content)}\r\n"
             "Access-Control-Allow-Origin: *\r\n"
             "Connection: close\r\n"
             "\r\n"
-            f"{content}"
-        )
-        self.request.sendall(response.encode("utf-8"))
+        ).encode("ascii")
+        self.request.sendall(header + content)
     
     def send_response(self, code, message):
         """Envía respuesta de error"""
-        content = json.dumps({"error": message})
-        response = (
+        content = json_bytes({"error": message})
+        header = (
             f"HTTP/1.1 {code} {message}\r\n"
             "Content-Type: application/json\r\n"
+            f"Content-Length: {len(content)}\r\n"
             "Access-Control-Allow-Origin: *\r\n"
             "Connection: close\r\n"
             "\r\n"
-            f"{content}"
-        )
-        self.request.sendall(response.encode("utf-8"))
+        ).encode("utf-8")
+        self.request.sendall(header + content)
 
 
-class ThreadedBenchmarkServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+class ThreadPoolMixIn(socketserver.ThreadingMixIn):
+    """
+    Variante de ThreadingMixIn que atiende las conexiones con un pool
+    de hilos reutilizables en lugar de crear un hilo por conexión.
+    """
+    max_workers = 32
+    
+    def server_activate(self):
+        super().server_activate()
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+    
+    def process_request(self, request, client_address):
+        self._pool.submit(self.process_request_thread, request, client_address)
+    
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=True)
+
+
+class ThreadedBenchmarkServer(ThreadPoolMixIn, socketserver.TCPServer):
     allow_reuse_address = True
 
 
@@ -433,16 +1062,27 @@ def start_all_servers():
     print("  BENCHMARK SERVER - Pruebas de Rendimiento desde Backend")
     print("="*60)
     
+    # Cliente y servidores en núcleos distintos. La afinidad se fija en el
+    # hilo principal antes de crear hilos, así la heredan los del cliente
+    affinity = split_cpu_affinity()
+    if affinity:
+        client_cpus, server_cpus = affinity
+        os.sched_setaffinity(0, client_cpus)
+        print(f"\nCPUs cliente: {client_cpus} | CPUs servidores: {server_cpus}")
+    
     # Iniciar servidor Threading
     print(f"\nIniciando servidor Threading en puerto {THREADING_PORT}...")
     threading_proc = subprocess.Popen(
         [sys.executable, "http_server.py", str(THREADING_PORT), "threading"],
         stdout=subprocess.DEVNULL,
         stderr=subprocess.DEVNULL,
-        cwd=os.getcwd()
+        cwd=os.getcwd(),
+        start_new_session=True,
+        close_fds=True
     )
-    processes.append(("Threading", threading_proc))
-    time.sleep(0.5)
+    processes.append(("Threading", threading_proc, THREADING_PORT))
+    if affinity:
+        pin_server_process(threading_proc.pid, server_cpus)
     
     # Iniciar servidor Forking (solo Unix)
     if IS_UNIX_LIKE:
@@ -451,13 +1091,21 @@ def start_all_servers():
             [sys.executable, "http_server.py", str(FORKING_PORT), "forking"],
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
-            cwd=os.getcwd()
+            cwd=os.getcwd(),
+            start_new_session=True,
+            close_fds=True
         )
-        processes.append(("Forking", forking_proc))
-        time.sleep(0.5)
+        processes.append(("Forking", forking_proc, FORKING_PORT))
+        if affinity:
+            pin_server_process(forking_proc.pid, server_cpus)
     else:
         print("Forking no disponible en este sistema (Windows)")
     
+    # Esperar a que ambos acepten conexiones (arrancan en paralelo)
+    for name, proc, port in processes:
+        if not wait_for_server(port, proc=proc):
+            print(f"ADVERTENCIA: el servidor {name} no respondió en el puerto {port}")
+    
     # Iniciar servidor de Benchmark
     print(f"Iniciando servidor de Benchmark en puerto {BENCHMARK_PORT}...")
     benchmark_server = ThreadedBenchmarkServer((HOST, BENCHMARK_PORT), BenchmarkRequestHandler)
@@ -477,11 +1125,12 @@ def start_all_servers():
         benchmark_server.serve_forever()
     except KeyboardInterrupt:
         print("\n\nDeteniendo servidores...")
-        for name, proc in processes:
+        for name, proc, port in processes:
             proc.terminate()
             proc.wait()
             print(f"  {name} detenido")
         benchmark_server.shutdown()
+        benchmark_server.server_close()
         print("Todos los servidores detenidos.")
 
 
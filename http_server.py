@@ -1,13 +1,24 @@
+import asyncio
+import socket
 import socketserver
 import threading
 import os
 import time
+import signal
 import sys
 import json
 import platform
 import io
-from pathlib import Path
-from multiprocessing import Value, Lock
+import gzip
+import itertools
+import stat
+import select
+import selectors
+import ctypes
+from collections import OrderedDict
+import multiprocessing
+from multiprocessing import RawArray, Lock
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from datetime import datetime, timezone
 from email.utils import formatdate
 from urllib.parse import urlparse, parse_qs
@@ -21,23 +32,619 @@ except ImportError:
     print("Nota: Pillow no instalado. Procesamiento de imágenes deshabilitado.")
     print("Instala con: pip install Pillow")
 
+# Brotli (opcional) para precomprimir archivos de texto
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Event loop alternativo (opcional) para el modo asyncio
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+# Serialización JSON en C (opcional)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def json_bytes(data):
+    """Serializa a JSON (bytes UTF-8) usando orjson si está disponible"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode("utf-8")
+
 
 HOST = "0.0.0.0"
 PORT = 8080
-BUFFER_SIZE = 4096
+BUFFER_SIZE = 8192  # Tamaño máximo de línea de petición + headers
+KEEP_ALIVE_TIMEOUT = 5  # Segundos que una conexión persistente espera otra petición
+REQUEST_TIMEOUT = 10  # Segundos para recibir los headers de una petición
 PUBLIC_DIR = "public"
+PUBLIC_ROOT = os.path.realpath(PUBLIC_DIR)  # Ruta absoluta, calculada una vez
+PUBLIC_PREFIX = PUBLIC_ROOT + os.sep
 SERVER_NAME = "PythonHTTPServer/1.0"
 
 # Detectar sistema operativo
 IS_UNIX_LIKE = platform.system() in ['Linux', 'Darwin', 'FreeBSD', 'OpenBSD']
 
-# Métricas compartidas entre procesos
-request_count = Value('i', 0)
-total_response_time = Value('d', 0.0)
-lock = Lock()
+# TCP_CORK solo existe en Linux; sendmsg y sendfile no existen en Windows
+TCP_CORK = getattr(socket, "TCP_CORK", None)
+HAS_SENDMSG = hasattr(socket.socket, "sendmsg")
+HAS_SENDFILE = IS_UNIX_LIKE and hasattr(os, "sendfile")
+HAS_MEMFD = HAS_SENDFILE and hasattr(os, "memfd_create")  # Solo Linux
+HAS_POLL = hasattr(select, "poll")  # No existe en Windows
+FILE_CHUNK_SIZE = 64 * 1024
+
+# Buffers de envío/recepción del socket de escucha; las conexiones
+# aceptadas los heredan
+SOCKET_BUFFER_SIZE = 256 * 1024
+# Buffer de envío para los bodies que no caben en SOCKET_BUFFER_SIZE
+# (archivos grandes): menos vueltas de sendfile esperando espacio
+LARGE_SEND_BUFFER_SIZE = 1024 * 1024
+
+# Métricas compartidas entre procesos, repartidas en franjas (stripes):
+# cada hilo/proceso suma en su propia franja con un lock sin contención y
+# al leer se suman todas (mismo esquema que LongAdder).
+# Cada franja lleva además un número de secuencia (seqlock): el escritor lo
+# deja impar mientras actualiza, y el lector reintenta si lo ve impar o
+# cambiado, así las lecturas no toman ningún lock. Un escritor interrumpido
+# entre los dos pasos (Ctrl+C) deja el número impar: el siguiente escritor
+# lo corrige (seq |= 1 en vez de += 1) y el lector reintenta un número
+# acotado de veces (METRICS_READ_RETRIES) antes de usar lo que leyó.
+# Cada franja ocupa su propia línea de caché (64 bytes) para que los
+# núcleos no se invaliden entre sí al escribir en franjas vecinas
+METRIC_STRIPES = 16
+CACHE_LINE_SIZE = 64
+METRICS_READ_RETRIES = 1000
+
+
+class _MetricStripe(ctypes.Structure):
+    _fields_ = [
+        ("seq", ctypes.c_uint64),
+        ("count", ctypes.c_int64),
+        ("time_ns", ctypes.c_uint64),
+        ("pad", ctypes.c_uint8 * (CACHE_LINE_SIZE - 24)),
+    ]
+
+
+# Memoria compartida con margen para alinear el arreglo a una línea de caché
+_stripe_raw = RawArray(ctypes.c_uint8, CACHE_LINE_SIZE * (METRIC_STRIPES + 1))
+_stripes = (_MetricStripe * METRIC_STRIPES).from_buffer(
+    _stripe_raw, -ctypes.addressof(_stripe_raw) % CACHE_LINE_SIZE
+)
+_stripe_locks = [Lock() for _ in range(METRIC_STRIPES)]
+_stripe_seq = itertools.count()
+
+# Cada hilo acumula sus peticiones localmente y las publica en su franja
+# cada METRICS_FLUSH_EVERY peticiones o al llamar a flush_metrics: los
+# servidores que reutilizan el hilo (prefork) toman el lock de la franja
+# una vez por lote y no una vez por petición
+METRICS_FLUSH_EVERY = 64
+_metrics_local = threading.local()
+
+
+def _metrics_state():
+    """
+    Estado de métricas del hilo actual: [franja, peticiones pendientes,
+    ns pendientes]. La franja se elige al primer uso combinando PID y un
+    contador, de modo que procesos e hilos distintos caigan en franjas
+    distintas.
+    """
+    state = getattr(_metrics_local, "state", None)
+    if state is None:
+        state = [(os.getpid() + next(_stripe_seq)) % METRIC_STRIPES, 0, 0]
+        _metrics_local.state = state
+    return state
+
+
+def _reset_metrics_state():
+    """En el hijo de un fork: elegir franja de nuevo y no heredar pendientes"""
+    _metrics_local.state = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_metrics_state)
+
+
+def _publish_metrics(state):
+    """Suma lo pendiente del hilo a su franja compartida y lo pone a cero"""
+    i = state[0]
+    stripe = _stripes[i]
+    with _stripe_locks[i]:
+        stripe.seq |= 1
+        stripe.count += state[1]
+        stripe.time_ns += state[2]
+        stripe.seq += 1
+    state[1] = 0
+    state[2] = 0
+
+
+def add_metrics(elapsed_ns):
+    """Acumula una petición y su tiempo (en ns) en el hilo actual"""
+    state = _metrics_state()
+    state[1] += 1
+    state[2] += elapsed_ns
+    if state[1] >= METRICS_FLUSH_EVERY:
+        _publish_metrics(state)
+
+
+def flush_metrics():
+    """Publica en la franja compartida lo pendiente del hilo actual"""
+    state = getattr(_metrics_local, "state", None)
+    if state is not None and state[1]:
+        _publish_metrics(state)
+
+
+def read_metrics():
+    """
+    Retorna (peticiones, tiempo total en ns) sumando todas las franjas.
+    
+    No bloquea a los escritores: cada franja se relee hasta obtener un
+    par (count, time) consistente según su número de secuencia, o hasta
+    METRICS_READ_RETRIES intentos si quedó impar por un escritor
+    interrumpido (p. ej. Ctrl+C en print_metrics de forking/prefork).
+    """
+    count = 0
+    total_ns = 0
+    for stripe in _stripes:
+        for _ in range(METRICS_READ_RETRIES):
+            seq = stripe.seq
+            if not seq & 1:
+                stripe_count = stripe.count
+                stripe_time = stripe.time_ns
+                if stripe.seq == seq:
+                    break
+            # Escritura en curso: ceder el GIL/CPU al escritor y reintentar
+            time.sleep(0)
+        else:
+            # Nadie completó la escritura: usar los valores tal como quedaron
+            stripe_count = stripe.count
+            stripe_time = stripe.time_ns
+        count += stripe_count
+        total_ns += stripe_time
+    return count, total_ns
+
+
+def clear_metrics():
+    """Pone a cero todas las franjas y lo pendiente del hilo actual"""
+    state = getattr(_metrics_local, "state", None)
+    if state is not None:
+        state[1] = 0
+        state[2] = 0
+    for stripe, lock in zip(_stripes, _stripe_locks):
+        with lock:
+            stripe.seq |= 1
+            stripe.count = 0
+            stripe.time_ns = 0
+            stripe.seq += 1
+
+CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".js": "application/javascript; charset=utf-8",
+    ".json": "application/json; charset=utf-8",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".txt": "text/plain; charset=utf-8",
+    ".mp4": "video/mp4",
+    ".pdf": "application/pdf",
+}
+
+# Fragmentos de headers constantes, codificados una sola vez
+_STATUS_OK_DATE = b"HTTP/1.1 200 OK\r\nDate: "
+_CRLF = b"\r\n"
+_SERVER_LINE = f"Server: {SERVER_NAME}\r\n".encode("ascii")
+_CORS_LINE = b"Access-Control-Allow-Origin: *\r\n"
+# Último header de cada respuesta (y fin de headers): se elige al enviar
+# según si la conexión sigue abierta (ver HTTPRequestHandler.handle)
+_CLOSE_END = b"Connection: close\r\n\r\n"
+_KEEP_ALIVE_END = (
+    "Connection: keep-alive\r\n"
+    f"Keep-Alive: timeout={KEEP_ALIVE_TIMEOUT}\r\n"
+    "\r\n"
+).encode("ascii")
+
+# Línea Content-Type ya codificada por extensión, lista para empalmar
+_CT_HEADERS = {ext: f"Content-Type: {t}\r\n".encode("ascii") for ext, t in CONTENT_TYPES.items()}
+_CT_DEFAULT = b"Content-Type: application/octet-stream\r\n"
+
+# Plantilla de headers JSON: solo Date y Content-Length cambian por respuesta
+# (Connection se agrega al enviar)
+_JSON_HEAD_TMPL = (
+    "HTTP/1.1 200 OK\r\n"
+    "Date: %s\r\n"
+    f"Server: {SERVER_NAME}\r\n"
+    "Content-Type: application/json; charset=utf-8\r\n"
+    "Content-Length: %d\r\n"
+    "Access-Control-Allow-Origin: *\r\n"
+).encode("ascii")
+
+_RESET_BODY = json_bytes({"status": "ok", "message": "Metrics reset"})
+
+# /api/metrics tiene un esquema fijo: se arma con una plantilla de bytes
+# con el mismo formato que json.dumps(indent=2), sin pasar por json
+_METRICS_TMPL = (
+    b'{\n'
+    b'  "mode": "%s",\n'
+    b'  "port": %d,\n'
+    b'  "requests": %d,\n'
+    b'  "avg_time": %.4f,\n'
+    b'  "total_time": %.4f\n'
+    b'}'
+)
+
+# Query parameters de una ruta sin query string (compartido: no modificar)
+_NO_PARAMS = {}
+
+# JSON de /api/info: no cambia mientras el proceso vive, se serializa una
+# vez en run_server (ver build_server_info)
+_info_body = None
+
+
+def build_error_parts(code, message):
+    """
+    Construye una respuesta de error (RFC 9110 Section 15) partida en tres
+    trozos de bytes: hasta "Date: ", desde el fin de Date hasta antes de
+    Connection, y el body. Solo la fecha y Connection se insertan en cada
+    envío.
+    """
+    body = f"""<!DOCTYPE html>
+<html>
+<head><title>{code} {message}</title></head>
+<body>
+<h1>{code} {message}</h1>
+<hr>
+<p>{SERVER_NAME}</p>
+</body>
+</html>""".encode("utf-8")
+
+    head = f"HTTP/1.1 {code} {message}\r\nDate: ".encode("utf-8")
+    tail = (
+        "\r\n"
+        f"Server: {SERVER_NAME}\r\n"
+        "Content-Type: text/html; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Access-Control-Allow-Origin: *\r\n"
+    ).encode("ascii")
+    return head, tail, body
+
+
+# Errores frecuentes ya construidos
+_ERROR_RESPONSES = {
+    (code, message): build_error_parts(code, message)
+    for code, message in [
+        (400, "Bad Request"),
+        (403, "Forbidden"),
+        (404, "Not Found"),
+        (405, "Method Not Allowed"),
+        (431, "Request Header Fields Too Large"),
+        (500, "Internal Server Error"),
+    ]
+}
+
+# Caché LRU de archivos estáticos pequeños:
+# ruta -> (mtime_ns, {codificación: (headers sin línea de estado, Date ni
+# Connection, body)})
+# La codificación "" es el archivo original; los de texto tienen además
+# variantes "gzip" (y "br" si hay Brotli) comprimidas al cargarlos
+STATIC_CACHE_MAX_FILE = 256 * 1024
+STATIC_CACHE_MAX_ENTRIES = 128
+COMPRESSIBLE_EXTENSIONS = {".html", ".css", ".js", ".json", ".txt"}
+# Archivos precomprimidos junto al original (p. ej. app.js.gz), generados
+# al desplegar: codificación -> sufijo
+SIDECAR_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+_static_cache = OrderedDict()
+_static_cache_lock = threading.RLock()
+
+
+def build_static_headers(ext, length, last_modified, encoding=""):
+    """Headers de un archivo estático (sin línea de estado, Date ni Connection)"""
+    parts = [
+        _SERVER_LINE,
+        _CT_HEADERS.get(ext, _CT_DEFAULT),
+        f"Content-Length: {length}\r\n".encode("ascii"),
+        f"Last-Modified: {last_modified}\r\n".encode("ascii"),
+    ]
+    if encoding:
+        parts.append(f"Content-Encoding: {encoding}\r\n".encode("ascii"))
+    if ext in COMPRESSIBLE_EXTENSIONS:
+        # La respuesta depende de Accept-Encoding (RFC 9110 Section 12.5.5)
+        parts.append(b"Vary: Accept-Encoding\r\n")
+    parts += [b"Accept-Ranges: bytes\r\n", _CORS_LINE]
+    return b"".join(parts)
+
+
+def stat_sidecar(file_path, st, encoding):
+    """
+    os.stat del archivo precomprimido de 'file_path' para 'encoding', o
+    None si no existe o es más viejo que el original (quedó desactualizado).
+    """
+    try:
+        sidecar_st = os.stat(file_path + SIDECAR_SUFFIXES[encoding])
+    except OSError:
+        return None
+    if not stat.S_ISREG(sidecar_st.st_mode) or sidecar_st.st_mtime_ns < st.st_mtime_ns:
+        return None
+    return sidecar_st
+
+
+def load_static_entry(file_path, st):
+    """
+    Lee un archivo pequeño y guarda su entrada en la caché: el body y los
+    headers de la respuesta ya codificados, salvo Date que cambia en cada
+    petición. Los archivos de texto se comprimen aquí una sola vez (o se
+    usan sus .gz/.br precomprimidos si existen).
+    Solo los fallos de caché pasan por aquí y toman el lock.
+    """
+    with open(file_path, "rb") as f:
+        body = f.read()
+
+    ext = os.path.splitext(file_path)[1].lower()
+    last_modified = formatdate(timeval=st.st_mtime, localtime=False, usegmt=True)
+    variants = {"": (build_static_headers(ext, len(body), last_modified), body)}
+
+    if ext in COMPRESSIBLE_EXTENSIONS:
+        compressed = {}
+        for encoding in SIDECAR_SUFFIXES:
+            if stat_sidecar(file_path, st, encoding) is not None:
+                with open(file_path + SIDECAR_SUFFIXES[encoding], "rb") as f:
+                    compressed[encoding] = f.read()
+        if "gzip" not in compressed:
+            compressed["gzip"] = gzip.compress(body, 9)
+        if "br" not in compressed and BROTLI_AVAILABLE:
+            compressed["br"] = brotli.compress(body)
+        for encoding, data in compressed.items():
+            if len(data) < len(body):
+                variants[encoding] = (build_static_headers(ext, len(data), last_modified, encoding), data)
+
+    entry = (st.st_mtime_ns, variants)
+
+    with _static_cache_lock:
+        _static_cache[file_path] = entry
+        _static_cache.move_to_end(file_path)
+        while len(_static_cache) > STATIC_CACHE_MAX_ENTRIES:
+            _static_cache.popitem(last=False)
+    return entry
+
+
+# Metadatos de archivos grandes (los que no entran en la caché):
+# ruta -> (mtime_ns, headers sin línea de estado ni Date)
+_file_meta_cache = {}
+_file_meta_lock = threading.Lock()
+
+
+def cached_file_headers(file_path, st, ext, encoding=""):
+    """
+    Headers de un archivo grande a partir del os.stat ya hecho. Se
+    memorizan por ruta y se invalidan por mtime, así formatdate y la
+    construcción de headers solo ocurren cuando el archivo cambia.
+    Para un precomprimido, 'file_path'/'st' son los del .gz/.br y 'ext'
+    la del original.
+    """
+    entry = _file_meta_cache.get(file_path)
+    if entry is not None and entry[0] == st.st_mtime_ns:
+        return entry[1]
+
+    last_modified = formatdate(timeval=st.st_mtime, localtime=False, usegmt=True)
+    headers = build_static_headers(ext, st.st_size, last_modified, encoding)
+    with _file_meta_lock:
+        if len(_file_meta_cache) >= STATIC_CACHE_MAX_ENTRIES:
+            _file_meta_cache.clear()
+        _file_meta_cache[file_path] = (st.st_mtime_ns, headers)
+    return headers
+
+
+def parse_range(value, size):
+    """
+    Interpreta un header Range de un solo rango de bytes (RFC 9110
+    Section 14.2) para un archivo de 'size' bytes. Retorna (inicio, fin)
+    inclusivos, None si se ignora (se envía el archivo completo: otras
+    unidades, varios rangos o sintaxis inválida) o False si no es
+    satisfacible (416).
+    """
+    value = value.strip()
+    if not value.startswith(b"bytes="):
+        return None
+    first, sep, last = value[6:].partition(b"-")
+    first = first.strip()
+    last = last.strip()
+    # Solo dígitos a cada lado del guion (int aceptaría "-5", "+5" o "5_0");
+    # cualquier otra cosa, incluidas las comas, es sintaxis inválida
+    if not sep or not (first or last) or not (first or b"0").isdigit() or not (last or b"0").isdigit():
+        return None
+    if not first:
+        # Sufijo: los últimos N bytes
+        suffix = int(last)
+        if not suffix or not size:
+            return False
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    if start >= size:
+        return False
+    end = int(last) if last else size - 1
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+# Fecha HTTP actual, recalculada como mucho una vez por segundo:
+# (segundo, fecha ya codificada)
+_http_date = (0, b"")
+
+
+def http_date_bytes():
+    """
+    Fecha actual en formato HTTP (RFC 9110 Section 5.6.7), memorizada por
+    segundo y ya codificada para empalmar en los headers
+    """
+    global _http_date
+    now = int(time.time())
+    cached = _http_date
+    if cached[0] != now:
+        cached = (now, formatdate(timeval=now, localtime=False, usegmt=True).encode("ascii"))
+        _http_date = cached
+    return cached[1]
+
+
+def prewarm_static_cache():
+    """
+    Carga en caché los archivos pequeños de PUBLIC_DIR al arrancar, así
+    los procesos hijos del modo forking ya la heredan llena.
+    """
+    for root, _dirs, files in os.walk(PUBLIC_ROOT):
+        for name in files:
+            file_path = os.path.join(root, name)
+            try:
+                st = os.stat(file_path)
+                if st.st_size <= STATIC_CACHE_MAX_FILE:
+                    load_static_entry(file_path, st)
+            except OSError:
+                pass
+
+
+def resize_image(file_path, resize_percent):
+    """
+    Redimensiona y recomprime una imagen (CPU INTENSIVO).
+    
+    Función de módulo para poder ejecutarse en el pool de procesos.
+    Retorna (bytes, formato de salida, tamaño original, tamaño nuevo).
+    """
+    # Abrir imagen con Pillow (CPU intensivo: decodificación)
+    with Image.open(file_path) as img:
+        original_size = img.size
+        
+        # Calcular nuevo tamaño
+        new_width = int(img.width * resize_percent / 100)
+        new_height = int(img.height * resize_percent / 100)
+
+        # JPEG a un cuarto o menos: libjpeg decodifica directamente a
+        # 1/2, 1/4 o 1/8 en el dominio DCT (sin IDCT de los bloques
+        # completos) y LANCZOS solo ajusta el resto. Se pide el doble del
+        # tamaño final (como reducing_gap=2.0 de thumbnail) para que
+        # LANCZOS conserve margen y no baje la calidad
+        if img.format == 'JPEG' and resize_percent <= 25:
+            img.draft(img.mode, (new_width * 2, new_height * 2))
+        
+        # Redimensionar (CPU intensivo: interpolación de píxeles)
+        # Usar LANCZOS para mejor calidad (más CPU)
+        resized_img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        
+        # Determinar formato de salida
+        output_format = 'PNG' if file_path.lower().endswith('.png') else 'JPEG'
+        
+        # Guardar en memoria (CPU intensivo: codificación)
+        output_buffer = io.BytesIO()
+        if output_format == 'JPEG':
+            resized_img.save(output_buffer, format=output_format, quality=85, optimize=True)
+        else:
+            resized_img.save(output_buffer, format=output_format, optimize=True)
+    
+    return output_buffer.getvalue(), output_format, original_size, (new_width, new_height)
+
+
+# Caché LRU de resultados de procesamiento (?process=true / ?resize=):
+# (ruta, mtime_ns, resize) -> (headers sin línea de estado ni Date, body, tamaño)
+# Acotada en entradas y en bytes totales. En forking cada hijo parte de
+# la copia del padre, así que solo aprovecha en threading/prefork/asyncio.
+# Los bodies grandes se guardan en un memfd (archivo anónimo en memoria)
+# en lugar de bytes: cada acierto sale con sendfile, sin copiarlos desde
+# memoria de Python al socket
+MEDIA_CACHE_MAX_ENTRIES = 256
+MEDIA_CACHE_MAX_BYTES = 256 * 1024 * 1024
+MEDIA_MEMFD_MIN_SIZE = 64 * 1024
+_media_cache = OrderedDict()
+_media_cache_bytes = 0
+_media_cache_lock = threading.Lock()
+
+
+def stage_in_memfd(data):
+    """
+    Copia 'data' a un memfd y retorna el archivo abierto. El fd se cierra
+    cuando nadie referencia el archivo (un envío en curso lo mantiene
+    vivo aunque la entrada se desaloje de la caché).
+    """
+    f = io.FileIO(os.memfd_create("media", os.MFD_CLOEXEC), "r+")
+    view = memoryview(data)
+    while view:
+        view = view[f.write(view):]
+    return f
+
+
+def get_media_result(key):
+    """Retorna (headers, body, tamaño) de un resultado ya procesado, o None"""
+    result = _media_cache.get(key)
+    if result is not None:
+        try:
+            _media_cache.move_to_end(key)
+        except KeyError:
+            pass  # Desalojada por otro hilo mientras tanto
+    return result
+
+
+def store_media_result(key, headers, body):
+    """Guarda un resultado procesado, desalojando los más antiguos si hace falta"""
+    global _media_cache_bytes
+    body_size = len(body)
+    size = len(headers) + body_size
+    if size > MEDIA_CACHE_MAX_BYTES:
+        return
+    if HAS_MEMFD and body_size >= MEDIA_MEMFD_MIN_SIZE:
+        body = stage_in_memfd(body)
+    with _media_cache_lock:
+        old = _media_cache.pop(key, None)
+        if old is not None:
+            _media_cache_bytes -= len(old[0]) + old[2]
+        _media_cache[key] = (headers, body, body_size)
+        _media_cache_bytes += size
+        while len(_media_cache) > MEDIA_CACHE_MAX_ENTRIES or _media_cache_bytes > MEDIA_CACHE_MAX_BYTES:
+            _, (old_headers, _old_body, old_size) = _media_cache.popitem(last=False)
+            _media_cache_bytes -= len(old_headers) + old_size
+
+
+# Pool de procesos para redimensionar imágenes en los modos con hilos:
+# el trabajo sale del GIL como en forking, pero con procesos ya creados
+# en lugar de un fork() por petición. Se crea al primer uso.
+IMAGE_POOL_MODES = {"threading", "asyncio"}
+_image_pool = None
+_image_pool_lock = threading.Lock()
+
+
+def get_image_pool():
+    """Retorna el pool de procesos para imágenes, creándolo si hace falta"""
+    global _image_pool
+    if _image_pool is None:
+        with _image_pool_lock:
+            if _image_pool is None:
+                # Los workers no se crean con fork: el servidor ya tiene
+                # hilos vivos y un fork mientras otro hilo tiene un lock
+                # puede bloquear al hijo. Ignoran Ctrl+C: run_server los
+                # cierra con shutdown_image_pool al salir
+                _image_pool = ProcessPoolExecutor(
+                    max_workers=os.cpu_count() or 1,
+                    mp_context=multiprocessing.get_context("forkserver" if IS_UNIX_LIKE else "spawn"),
+                    initializer=signal.signal,
+                    initargs=(signal.SIGINT, signal.SIG_IGN),
+                )
+    return _image_pool
+
+
+def shutdown_image_pool():
+    """Cierra el pool de procesos para imágenes si se llegó a crear"""
+    if _image_pool is not None:
+        _image_pool.shutdown(wait=True)
+
 
 # Modo del servidor (se configura via argumentos)
-SERVER_MODE = "threading"  # threading o forking
+SERVER_MODE = "threading"  # threading, forking, prefork o asyncio
 
 
 class HTTPRequestHandler(socketserver.BaseRequestHandler):
@@ -46,76 +653,164 @@ class HTTPRequestHandler(socketserver.BaseRequestHandler):
     https://www.rfc-editor.org/rfc/rfc9110.html
     """
     
+    # Por defecto la conexión se cierra tras la respuesta; handle decide
+    # por petición si sigue abierta (RFC 9112 Section 9.3)
+    close_connection = True
+    connection_end = _CLOSE_END
+
+    def setup(self):
+        # Desactivar Nagle: las respuestas pequeñas (JSON, errores) salen sin
+        # esperar ACK; los envíos de archivos se agrupan con TCP_CORK
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
     def handle(self):
-        start_time = time.time()
+        """
+        Atiende peticiones en la misma conexión (keep-alive) hasta que el
+        cliente la cierre, pida Connection: close o el servidor decida no
+        esperar más (ver wait_keep_alive de cada servidor).
+        Lee con recv_into sobre un buffer preasignado; lo que llega después
+        del fin de una petición (pipelining) queda al inicio del buffer para
+        la siguiente.
+        """
+        buffer = bytearray(BUFFER_SIZE)
+        view = memoryview(buffer)
+        filled = 0
+        # Tras la primera petición la conexión sigue solo si se anunció
+        # keep-alive y el servidor acepta esperar la siguiente
+        self.close_connection = False
+        try:
+            while not self.close_connection:
+                if not filled and self.connection_end is _KEEP_ALIVE_END:
+                    if not self.server.wait_keep_alive(self.request):
+                        return
+                filled = self.handle_one_request(buffer, view, filled)
+        finally:
+            view.release()
+
+    def handle_one_request(self, buffer, view, filled):
+        """
+        Lee, despacha y responde una petición; retorna cuántos bytes de la
+        siguiente (pipelining) quedaron al inicio de 'buffer'
+        """
+        # Reloj monotónico en ns: entero y sin saltos por ajustes de hora
+        start_ns = time.monotonic_ns()
+        self.close_connection = True
+        self.connection_end = _CLOSE_END
+        # Solo cuenta en las métricas si llegó una línea de petición válida:
+        # el cierre de una conexión keep-alive no es una petición
+        parsed = False
 
         try:
-            data_bytes = self.request.recv(BUFFER_SIZE)
-            if not data_bytes:
-                return
+            # Leer hasta el fin de los headers (CRLFCRLF); puede estar ya en
+            # el buffer si llegó junto con la petición anterior
+            end = buffer.find(b"\r\n\r\n", 0, filled)
+            if end == -1:
+                # Plazo para recibir los headers: un cliente que conecta y no
+                # envía nada (p. ej. una preconexión del navegador) no retiene
+                # un hilo del pool indefinidamente. Se vuelve a modo bloqueante
+                # antes de responder: os.sendfile lo necesita
+                self.request.settimeout(REQUEST_TIMEOUT)
+                try:
+                    while end == -1:
+                        if filled == BUFFER_SIZE:
+                            self.send_error_response(431, "Request Header Fields Too Large")
+                            return 0
+                        n = self.request.recv_into(view[filled:])
+                        if not n:
+                            return 0
+                        # Buscar solo en lo nuevo, más 3 bytes por si CRLFCRLF quedó partido
+                        end = buffer.find(b"\r\n\r\n", max(0, filled - 3), filled + n)
+                        filled += n
+                finally:
+                    self.request.settimeout(None)
 
-            request = data_bytes.decode("utf-8")
-            lines = request.split("\r\n")
-            
-            # Parsear línea de petición (RFC 9110 Section 3.1)
-            request_line = lines[0].split()
+            # Copiar la petición y mover lo que sobra al inicio del buffer
+            end += 4
+            data_bytes = buffer[:end]
+            pending = filled - end
+            if pending:
+                buffer[:pending] = buffer[end:filled]
+
+            # Parsear línea de petición (RFC 9110 Section 3.1) buscando
+            # los separadores directamente en los bytes, sin decodificar
+            # ni partir todo el buffer
+            sp1 = data_bytes.find(b" ")
+            sp2 = data_bytes.find(b" ", sp1 + 1) if sp1 > 0 else -1
+            eol = data_bytes.find(b"\r\n", sp2 + 1) if sp2 > sp1 + 1 else -1
 
-            if len(request_line) < 3:
+            if eol == -1 or eol == sp2 + 1:
                 self.send_error_response(400, "Bad Request")
-                return
+                return 0
 
-            method, path, http_version = request_line
-            
-            # Parsear headers de la petición
-            headers = self.parse_headers(lines[1:])
+            method = data_bytes[:sp1]
+            try:
+                path = data_bytes[sp1 + 1:sp2].decode("ascii")
+            except UnicodeDecodeError:
+                self.send_error_response(400, "Bad Request")
+                return 0
+
+            # Los headers se guardan sin parsear; ver find_header
+            self.raw_headers = data_bytes[eol + 2:]
+            parsed = True
+
+            # HTTP/1.1 es persistente salvo Connection: close; HTTP/1.0 se
+            # cierra. Con el servidor saturado se cierra para liberar el hilo,
+            # salvo que la siguiente petición (pipelining) ya esté en el buffer
+            if (data_bytes[sp2 + 1:eol] == b"HTTP/1.1"
+                    and not self.connection_close_requested()
+                    and (pending or self.server.keep_alive_allowed())):
+                self.close_connection = False
+                self.connection_end = _KEEP_ALIVE_END
             
             # Log de la petición
             client_ip = self.client_address[0]
-            print(f"[{SERVER_MODE}] {client_ip} - {method} {path} {http_version}")
+            print(f"[{SERVER_MODE}] {client_ip} - {data_bytes[:eol].decode('latin-1')}")
 
             # Métodos soportados: GET y HEAD (RFC 9110 Section 9.3)
-            if method == "GET":
+            if method == b"GET":
                 self.handle_get(path, include_body=True)
-            elif method == "HEAD":
+            elif method == b"HEAD":
                 # HEAD es igual a GET pero sin body (RFC 9110 Section 9.3.2)
                 self.handle_get(path, include_body=False)
             else:
                 self.send_error_response(405, "Method Not Allowed")
-                return
+            return pending
+
+        except ConnectionError:
+            # El cliente cerró o reseteó la conexión: no hay a quién responder
+            self.close_connection = True
+            return 0
+
+        except socket.timeout:
+            # El cliente no completó la petición a tiempo (REQUEST_TIMEOUT)
+            self.close_connection = True
+            return 0
 
         except Exception as e:
             print(f"[Error] {e}")
             self.send_error_response(500, "Internal Server Error")
+            return 0
 
         finally:
-            elapsed = time.time() - start_time
-            self.update_metrics(elapsed)
-    
-    def parse_headers(self, header_lines):
-        """Parsea los headers HTTP de la petición"""
-        headers = {}
-        for line in header_lines:
-            if not line:
-                break
-            if ":" in line:
-                key, value = line.split(":", 1)
-                headers[key.strip().lower()] = value.strip()
-        return headers
-    
-    def get_http_date(self):
-        """Retorna la fecha actual en formato HTTP (RFC 9110 Section 5.6.7)"""
-        return formatdate(timeval=None, localtime=False, usegmt=True)
-    
-    def get_file_modified_date(self, file_path):
-        """Retorna la fecha de modificación del archivo en formato HTTP"""
-        mtime = os.path.getmtime(file_path)
-        return formatdate(timeval=mtime, localtime=False, usegmt=True)
+            if parsed:
+                self.update_metrics(time.monotonic_ns() - start_ns)
+                # Servidores con batch_metrics publican en lote (service_actions)
+                if not getattr(self.server, "batch_metrics", False):
+                    flush_metrics()
 
     def parse_path_and_query(self, full_path):
         """Parsea la ruta y los query parameters"""
-        parsed = urlparse(full_path)
-        path = parsed.path
-        query_params = parse_qs(parsed.query)
+        if full_path[:1] == "/" and "#" not in full_path:
+            # Caso común (origin-form): basta con partir en "?", sin
+            # urlparse; sin query no se llama a parse_qs
+            path, _, query = full_path.partition("?")
+            if not query:
+                return path, _NO_PARAMS
+        else:
+            parsed = urlparse(full_path)
+            path = parsed.path
+            query = parsed.query
+        query_params = parse_qs(query)
         # Convertir listas a valores simples
         params = {k: v[0] if len(v) == 1 else v for k, v in query_params.items()}
         return path, params
@@ -128,165 +823,248 @@ class HTTPRequestHandler(socketserver.BaseRequestHandler):
             full_path: Ruta completa del recurso (puede incluir query string)
             include_body: True para GET, False para HEAD
         """
+        # Endpoints de la API (métricas, reset, info del servidor): la ruta
+        # exacta se despacha con un lookup, antes de parsear la URL
+        route = self.API_ROUTES.get(full_path)
+        if route is not None:
+            route(self, include_body)
+            return
+
         # Parsear path y query parameters
         path, params = self.parse_path_and_query(full_path)
         
-        # Endpoint especial para métricas (API)
-        if path == "/api/metrics":
-            self.send_metrics_json(include_body)
-            return
-
-        # Endpoint para resetear métricas
-        if path == "/api/reset":
-            self.reset_metrics(include_body)
-            return
-
-        # Endpoint para info del servidor
-        if path == "/api/info":
-            self.send_server_info(include_body)
+        # Endpoints de la API con query string (p. ej. ?t=... anti-caché)
+        route = self.API_ROUTES.get(path)
+        if route is not None:
+            route(self, include_body)
             return
 
         # Documento por defecto (RFC 9110 Section 7.1)
         if path == "/":
             path = "/index.html"
 
-        file_path = Path(PUBLIC_DIR + path)
+        # Rechazar de entrada rutas con "..", separadores de Windows o que no
+        # empiecen por "/": unas pocas búsquedas en un string corto, sin
+        # tocar el sistema de archivos
+        if ".." in path or "\\" in path or path[:1] != "/":
+            self.send_error_response(403, "Forbidden")
+            return
 
-        # Verificar que el archivo existe y es un archivo regular
-        if not file_path.exists() or not file_path.is_file():
-            self.send_error_response(404, "Not Found")
+        # Ruta absoluta normalizada dentro de PUBLIC_ROOT
+        file_path = os.path.normpath(os.path.join(PUBLIC_ROOT, path.lstrip("/")))
+
+        # Verificar que no se intenta acceder fuera de PUBLIC_DIR (seguridad):
+        # tras normpath basta comparar el prefijo, sin llamadas al sistema
+        if not file_path.startswith(PUBLIC_PREFIX) and file_path != PUBLIC_ROOT:
+            self.send_error_response(403, "Forbidden")
             return
-        
-        # Verificar que no se intenta acceder fuera de PUBLIC_DIR (seguridad)
+
+        # Verificar que el archivo existe y es un archivo regular (un solo stat)
         try:
-            file_path.resolve().relative_to(Path(PUBLIC_DIR).resolve())
-        except ValueError:
-            self.send_error_response(403, "Forbidden")
+            st = os.stat(file_path)
+        except (OSError, ValueError):
+            st = None
+        if st is None or not stat.S_ISREG(st.st_mode):
+            self.send_error_response(404, "Not Found")
             return
 
+        ext = os.path.splitext(file_path)[1].lower()
+
         # Verificar si se solicita procesamiento
         process_media = params.get("process") == "true" or params.get("resize")
         resize_percent = int(params.get("resize", 50)) if params.get("resize") else 50
+
+        # Resultados ya procesados se sirven desde la caché salvo con
+        # ?cache=false (el benchmark lo usa para medir el trabajo de CPU)
+        cache_key = None
+        if process_media and params.get("cache") != "false":
+            cache_key = (file_path, st.st_mtime_ns, resize_percent)
+            cached = get_media_result(cache_key)
+            if cached is not None:
+                self.send_media_response(*cached, include_body)
+                return
         
         # Si es una imagen y se solicita procesamiento
-        if process_media and PILLOW_AVAILABLE and file_path.suffix.lower() in ['.png', '.jpg', '.jpeg', '.gif']:
-            self.handle_image_processing(file_path, resize_percent, include_body)
+        if process_media and PILLOW_AVAILABLE and ext in ['.png', '.jpg', '.jpeg', '.gif']:
+            self.handle_image_processing(file_path, resize_percent, include_body, cache_key)
             return
         
         # Si es un video y se solicita procesamiento (calcular hashes - CPU intensivo)
-        if process_media and file_path.suffix.lower() in ['.mp4', '.avi', '.mov', '.mkv']:
-            self.handle_video_processing(file_path, include_body)
+        if process_media and ext in ['.mp4', '.avi', '.mov', '.mkv']:
+            self.handle_video_processing(file_path, include_body, cache_key)
             return
         
         # Si es un PDF y se solicita procesamiento (calcular hashes - CPU intensivo)
-        if process_media and file_path.suffix.lower() == '.pdf':
-            self.handle_pdf_processing(file_path, include_body)
+        if process_media and ext == '.pdf':
+            self.handle_pdf_processing(file_path, include_body, cache_key)
             return
 
         try:
-            content_type = self.get_content_type(file_path)
-            file_size = file_path.stat().st_size
-            last_modified = self.get_file_modified_date(file_path)
-            
-            # Construir headers de respuesta según RFC 9110
-            headers = [
-                "HTTP/1.1 200 OK",
-                f"Date: {self.get_http_date()}",
-                f"Server: {SERVER_NAME}",
-                f"Content-Type: {content_type}",
-                f"Content-Length: {file_size}",
-                f"Last-Modified: {last_modified}",
-                "Accept-Ranges: bytes",
-                "Access-Control-Allow-Origin: *",
-                "Connection: close",
+            # Range (RFC 9110 Section 14.2): solo en GET y sin If-Range
+            if include_body:
+                range_value = self.find_header(b"range")
+                if range_value is not None and self.find_header(b"if-range") is None:
+                    byte_range = parse_range(range_value, st.st_size)
+                    if byte_range is not None:
+                        self.send_file_range(file_path, st, ext, byte_range)
+                        return
+
+            if st.st_size <= STATIC_CACHE_MAX_FILE:
+                self.send_cached_file(file_path, st, include_body)
+                return
+
+            # Texto grande: servir el .br/.gz precomprimido si el cliente lo
+            # acepta (sin comprimir por petición, y sigue saliendo con sendfile)
+            encoding = ""
+            if ext in COMPRESSIBLE_EXTENSIONS:
+                sidecars = {}
+                for candidate in SIDECAR_SUFFIXES:
+                    sidecar_st = stat_sidecar(file_path, st, candidate)
+                    if sidecar_st is not None:
+                        sidecars[candidate] = sidecar_st
+                encoding = self.accepted_encoding(sidecars) if sidecars else ""
+                if encoding:
+                    file_path += SIDECAR_SUFFIXES[encoding]
+                    st = sidecars[encoding]
+
+            # Headers de respuesta según RFC 9110 (memorizados por archivo)
+            head = [
+                _STATUS_OK_DATE, http_date_bytes(), _CRLF,
+                cached_file_headers(file_path, st, ext, encoding),
+                self.connection_end,
             ]
             
-            response_headers = "\r\n".join(headers) + "\r\n\r\n"
-            self.request.sendall(response_headers.encode("utf-8"))
-            
             # Enviar body solo si es GET (no HEAD)
-            if include_body:
-                with open(file_path, "rb") as f:
-                    # Enviar en chunks para archivos grandes
-                    while True:
-                        chunk = f.read(65536)  # 64KB chunks
-                        if not chunk:
-                            break
-                        self.request.sendall(chunk)
+            if not include_body:
+                self.send_parts(head)
+                return
+            
+            with open(file_path, "rb") as f:
+                self.send_head_and_file(head, f, st.st_size)
 
         except Exception as e:
             print(f"Error reading file: {e}")
             self.send_error_response(500, "Internal Server Error")
     
-    def handle_image_processing(self, file_path, resize_percent, include_body=True):
+    def send_cached_file(self, file_path, st, include_body=True):
+        """
+        Sirve un archivo pequeño desde la caché, cargándolo si no está o
+        si su mtime cambió. Un acierto no toma locks: la lectura del dict
+        es atómica bajo el GIL.
+        """
+        entry = _static_cache.get(file_path)
+        if entry is None or entry[0] != st.st_mtime_ns:
+            entry = load_static_entry(file_path, st)
+        else:
+            try:
+                _static_cache.move_to_end(file_path)
+            except KeyError:
+                pass  # Desalojada por otro hilo mientras tanto
+
+        variants = entry[1]
+        headers, body = variants[self.accepted_encoding(variants) if len(variants) > 1 else ""]
+
+        parts = [_STATUS_OK_DATE, http_date_bytes(), _CRLF, headers, self.connection_end]
+        if include_body:
+            parts.append(body)
+        self.send_parts(parts)
+
+    def find_header(self, name):
+        """
+        Valor (bytes, en minúsculas) del header 'name' (bytes en minúsculas)
+        o None si no está. Busca directamente en los bytes de la petición,
+        sin parsear todos los headers.
+        """
+        raw = b"\n" + self.raw_headers.lower()
+        start = raw.find(b"\n" + name + b":")
+        if start == -1:
+            return None
+        start += len(name) + 2
+        end = raw.find(b"\r", start)
+        return raw[start:end if end != -1 else len(raw)].strip()
+
+    def connection_close_requested(self):
+        """
+        True si el header Connection incluye la opción "close"; es una lista
+        separada por comas (RFC 9110 Section 7.6.1), p. ej. "close, TE"
+        """
+        value = self.find_header(b"connection")
+        if value is None:
+            return False
+        return any(token.strip() == b"close" for token in value.split(b","))
+
+    def accepted_encoding(self, available):
+        """
+        Elige la codificación de 'available' que acepta el cliente según
+        Accept-Encoding ("br" antes que "gzip"); "" si ninguna.
+        """
+        value = self.find_header(b"accept-encoding")
+        if value is None:
+            return ""
+
+        accepted = set()
+        rejected = set()
+        for token in value.split(b","):
+            name, _, params = token.partition(b";")
+            if params.replace(b" ", b"").rstrip(b"0.") == b"q=":
+                rejected.add(name.strip())  # q=0: rechazada explícitamente
+            else:
+                accepted.add(name.strip())
+
+        # "*" solo cubre las codificaciones que no se nombran
+        # (RFC 9110 Section 12.5.3): "gzip;q=0, *" no acepta gzip
+        wildcard = b"*" in accepted
+        for encoding in ("br", "gzip"):
+            name = encoding.encode("ascii")
+            if encoding in available and (name in accepted or (wildcard and name not in rejected)):
+                return encoding
+        return ""
+
+    def handle_image_processing(self, file_path, resize_percent, include_body=True, cache_key=None):
         """
         Procesa una imagen: redimensiona y comprime (CPU INTENSIVO)
-        Este es el caso donde ForkingMixIn debería superar a ThreadingMixIn
+        En threading/asyncio el trabajo va al pool de procesos para no
+        serializarse en el GIL
         
         Args:
             file_path: Ruta del archivo de imagen
             resize_percent: Porcentaje de redimensión (1-100)
             include_body: True para GET, False para HEAD
+            cache_key: Clave para guardar el resultado en la caché (None: no guardar)
         """
         try:
-            print(f"[{SERVER_MODE}] Procesando imagen: {file_path.name} al {resize_percent}%")
+            print(f"[{SERVER_MODE}] Procesando imagen: {os.path.basename(file_path)} al {resize_percent}%")
             
-            # Abrir imagen con Pillow (CPU intensivo: decodificación)
-            with Image.open(file_path) as img:
-                original_size = img.size
-                
-                # Calcular nuevo tamaño
-                new_width = int(img.width * resize_percent / 100)
-                new_height = int(img.height * resize_percent / 100)
-                
-                # Redimensionar (CPU intensivo: interpolación de píxeles)
-                # Usar LANCZOS para mejor calidad (más CPU)
-                resized_img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                
-                # Determinar formato de salida
-                if file_path.suffix.lower() == '.png':
-                    output_format = 'PNG'
-                    content_type = 'image/png'
-                else:
-                    output_format = 'JPEG'
-                    content_type = 'image/jpeg'
-                
-                # Guardar en memoria (CPU intensivo: codificación)
-                output_buffer = io.BytesIO()
-                if output_format == 'JPEG':
-                    resized_img.save(output_buffer, format=output_format, quality=85, optimize=True)
-                else:
-                    resized_img.save(output_buffer, format=output_format, optimize=True)
-                
-                content = output_buffer.getvalue()
-                
-                print(f"[{SERVER_MODE}] Imagen procesada: {original_size} -> ({new_width}, {new_height}), {len(content)} bytes")
-            
-            # Construir headers de respuesta
-            headers = [
-                "HTTP/1.1 200 OK",
-                f"Date: {self.get_http_date()}",
-                f"Server: {SERVER_NAME}",
-                f"Content-Type: {content_type}",
-                f"Content-Length: {len(content)}",
-                "X-Image-Processed: true",
-                f"X-Original-Size: {original_size[0]}x{original_size[1]}",
-                f"X-New-Size: {new_width}x{new_height}",
-                "Access-Control-Allow-Origin: *",
-                "Connection: close",
-            ]
+            # En los modos con hilos se redimensiona en el pool de procesos;
+            # forking y prefork ya están en un proceso propio
+            if SERVER_MODE in IMAGE_POOL_MODES:
+                result = get_image_pool().submit(resize_image, file_path, resize_percent).result()
+            else:
+                result = resize_image(file_path, resize_percent)
+            content, output_format, original_size, (new_width, new_height) = result
+            content_type_header = _CT_HEADERS['.png' if output_format == 'PNG' else '.jpg']
             
-            response_headers = "\r\n".join(headers) + "\r\n\r\n"
-            self.request.sendall(response_headers.encode("utf-8"))
+            print(f"[{SERVER_MODE}] Imagen procesada: {original_size} -> ({new_width}, {new_height}), {len(content)} bytes")
             
-            if include_body:
-                self.request.sendall(content)
+            # Construir headers de respuesta
+            response_headers = b"".join([
+                _SERVER_LINE,
+                content_type_header,
+                f"Content-Length: {len(content)}\r\n"
+                "X-Image-Processed: true\r\n"
+                f"X-Original-Size: {original_size[0]}x{original_size[1]}\r\n"
+                f"X-New-Size: {new_width}x{new_height}\r\n".encode("ascii"),
+                _CORS_LINE,
+            ])
+            if cache_key is not None:
+                store_media_result(cache_key, response_headers, content)
+            self.send_media_response(response_headers, content, len(content), include_body)
                 
         except Exception as e:
             print(f"Error procesando imagen: {e}")
             self.send_error_response(500, f"Error processing image: {str(e)}")
     
-    def handle_video_processing(self, file_path, include_body=True):
+    def handle_video_processing(self, file_path, include_body=True, cache_key=None):
         """
         Procesa un video: lee bytes y calcula hash/checksum (CPU INTENSIVO EN PYTHON)
         
@@ -296,12 +1074,13 @@ class HTTPRequestHandler(socketserver.BaseRequestHandler):
         Args:
             file_path: Ruta del archivo de video
             include_body: True para GET, False para HEAD
+            cache_key: Clave para guardar el resultado en la caché (None: no guardar)
         """
         import hashlib
         
         try:
-            file_size = file_path.stat().st_size
-            print(f"[{SERVER_MODE}] Procesando video: {file_path.name} ({file_size / 1024 / 1024:.1f} MB)")
+            file_size = os.path.getsize(file_path)
+            print(f"[{SERVER_MODE}] Procesando video: {os.path.basename(file_path)} ({file_size / 1024 / 1024:.1f} MB)")
             
             # PROCESAMIENTO CPU INTENSIVO EN PYTHON:
             # 1. Leer el archivo en chunks
@@ -334,7 +1113,7 @@ class HTTPRequestHandler(socketserver.BaseRequestHandler):
             
             # Resultado del procesamiento
             result = {
-                "file": file_path.name,
+                "file": os.path.basename(file_path),
                 "size_bytes": file_size,
                 "size_mb": round(file_size / 1024 / 1024, 2),
                 "sha256": sha256_hash.hexdigest(),
@@ -344,35 +1123,29 @@ class HTTPRequestHandler(socketserver.BaseRequestHandler):
                 "server_mode": SERVER_MODE
             }
             
-            content = json.dumps(result, indent=2).encode('utf-8')
+            content = json_bytes(result)
             
             print(f"[{SERVER_MODE}] Video procesado: {chunk_count} chunks, checksum={byte_sum}")
             
             # Construir headers de respuesta
-            headers = [
-                "HTTP/1.1 200 OK",
-                f"Date: {self.get_http_date()}",
-                f"Server: {SERVER_NAME}",
-                "Content-Type: application/json",
-                f"Content-Length: {len(content)}",
-                "X-Video-Processed: true",
-                f"X-File-Size: {file_size}",
-                f"X-Checksum: {byte_sum}",
-                "Access-Control-Allow-Origin: *",
-                "Connection: close",
-            ]
-            
-            response_headers = "\r\n".join(headers) + "\r\n\r\n"
-            self.request.sendall(response_headers.encode("utf-8"))
-            
-            if include_body:
-                self.request.sendall(content)
+            response_headers = b"".join([
+                _SERVER_LINE,
+                b"Content-Type: application/json\r\n",
+                f"Content-Length: {len(content)}\r\n"
+                "X-Video-Processed: true\r\n"
+                f"X-File-Size: {file_size}\r\n"
+                f"X-Checksum: {byte_sum}\r\n".encode("ascii"),
+                _CORS_LINE,
+            ])
+            if cache_key is not None:
+                store_media_result(cache_key, response_headers, content)
+            self.send_media_response(response_headers, content, len(content), include_body)
                 
         except Exception as e:
             print(f"Error procesando video: {e}")
             self.send_error_response(500, f"Error processing video: {str(e)}")
     
-    def handle_pdf_processing(self, file_path, include_body=True):
+    def handle_pdf_processing(self, file_path, include_body=True, cache_key=None):
         """
         Procesa un PDF: lee bytes y calcula hash/checksum (CPU INTENSIVO EN PYTHON)
         Similar al procesamiento de video pero para documentos PDF.
@@ -380,12 +1153,13 @@ class HTTPRequestHandler(socketserver.BaseRequestHandler):
         Args:
             file_path: Ruta del archivo PDF
             include_body: True para GET, False para HEAD
+            cache_key: Clave para guardar el resultado en la caché (None: no guardar)
         """
         import hashlib
         
         try:
-            file_size = file_path.stat().st_size
-            print(f"[{SERVER_MODE}] Procesando PDF: {file_path.name} ({file_size / 1024:.1f} KB)")
+            file_size = os.path.getsize(file_path)
+            print(f"[{SERVER_MODE}] Procesando PDF: {os.path.basename(file_path)} ({file_size / 1024:.1f} KB)")
             
             # PROCESAMIENTO CPU INTENSIVO EN PYTHON:
             # 1. Leer el archivo en chunks
@@ -425,7 +1199,7 @@ class HTTPRequestHandler(socketserver.BaseRequestHandler):
             
             # Resultado del procesamiento
             result = {
-                "file": file_path.name,
+                "file": os.path.basename(file_path),
                 "type": "PDF Document",
                 "size_bytes": file_size,
                 "size_kb": round(file_size / 1024, 2),
@@ -438,160 +1212,447 @@ class HTTPRequestHandler(socketserver.BaseRequestHandler):
                 "server_mode": SERVER_MODE
             }
             
-            content = json.dumps(result, indent=2).encode('utf-8')
+            content = json_bytes(result)
             
             print(f"[{SERVER_MODE}] PDF procesado: {chunk_count} chunks, ~{page_markers} páginas, checksum={byte_sum}")
             
             # Construir headers de respuesta
-            headers = [
-                "HTTP/1.1 200 OK",
-                f"Date: {self.get_http_date()}",
-                f"Server: {SERVER_NAME}",
-                "Content-Type: application/json",
-                f"Content-Length: {len(content)}",
-                "X-PDF-Processed: true",
-                f"X-File-Size: {file_size}",
-                f"X-Estimated-Pages: {page_markers}",
-                f"X-Checksum: {byte_sum}",
-                "Access-Control-Allow-Origin: *",
-                "Connection: close",
-            ]
-            
-            response_headers = "\r\n".join(headers) + "\r\n\r\n"
-            self.request.sendall(response_headers.encode("utf-8"))
-            
-            if include_body:
-                self.request.sendall(content)
+            response_headers = b"".join([
+                _SERVER_LINE,
+                b"Content-Type: application/json\r\n",
+                f"Content-Length: {len(content)}\r\n"
+                "X-PDF-Processed: true\r\n"
+                f"X-File-Size: {file_size}\r\n"
+                f"X-Estimated-Pages: {page_markers}\r\n"
+                f"X-Checksum: {byte_sum}\r\n".encode("ascii"),
+                _CORS_LINE,
+            ])
+            if cache_key is not None:
+                store_media_result(cache_key, response_headers, content)
+            self.send_media_response(response_headers, content, len(content), include_body)
                 
         except Exception as e:
             print(f"Error procesando PDF: {e}")
             self.send_error_response(500, f"Error processing PDF: {str(e)}")
 
-    def send_json_response(self, data, include_body=True):
-        """Envía una respuesta JSON con headers HTTP/1.1 correctos"""
-        content = json.dumps(data, indent=2)
-        content_bytes = content.encode("utf-8")
-        
-        headers = [
-            "HTTP/1.1 200 OK",
-            f"Date: {self.get_http_date()}",
-            f"Server: {SERVER_NAME}",
-            "Content-Type: application/json; charset=utf-8",
-            f"Content-Length: {len(content_bytes)}",
-            "Access-Control-Allow-Origin: *",
-            "Connection: close",
+    def send_media_response(self, headers, content, size, include_body=True):
+        """
+        Envía un resultado de procesamiento (headers sin línea de estado,
+        Date ni Connection). 'content' son bytes o un memfd de la caché (ver
+        stage_in_memfd).
+        """
+        head = [_STATUS_OK_DATE, http_date_bytes(), _CRLF, headers, self.connection_end]
+        if not include_body:
+            self.send_parts(head)
+        elif isinstance(content, io.FileIO):
+            self.send_head_and_file(head, content, size)
+        else:
+            head.append(content)
+            self.send_parts(head)
+
+    def send_parts(self, parts):
+        """
+        Envía varios buffers (fragmentos de headers, body...) con una sola
+        llamada sendmsg (scatter/gather, writev), sin concatenarlos en
+        memoria. sendmsg puede escribir solo una parte: se reintenta con lo
+        que falte, y solo entonces se crea un memoryview del fragmento
+        cortado.
+        """
+        if not HAS_SENDMSG:
+            self.request.sendall(b"".join(parts))
+            return
+
+        parts = [part for part in parts if part]
+        while parts:
+            sent = self.request.sendmsg(parts)
+            while sent:
+                size = len(parts[0])
+                if sent >= size:
+                    sent -= size
+                    parts.pop(0)
+                else:
+                    parts[0] = memoryview(parts[0])[sent:]
+                    sent = 0
+
+    def send_file_range(self, file_path, st, ext, byte_range):
+        """
+        Envía una parte del archivo (206 Partial Content) con sendfile
+        desde el offset pedido, o 416 si el rango no es satisfacible
+        """
+        if byte_range is False:
+            self.send_parts([
+                b"HTTP/1.1 416 Range Not Satisfiable\r\nDate: ", http_date_bytes(), _CRLF,
+                _SERVER_LINE,
+                f"Content-Range: bytes */{st.st_size}\r\nContent-Length: 0\r\n".encode("ascii"),
+                _CORS_LINE,
+                self.connection_end,
+            ])
+            return
+
+        start, end = byte_range
+        length = end - start + 1
+        last_modified = formatdate(timeval=st.st_mtime, localtime=False, usegmt=True)
+        head = [
+            b"HTTP/1.1 206 Partial Content\r\nDate: ", http_date_bytes(), _CRLF,
+            f"Content-Range: bytes {start}-{end}/{st.st_size}\r\n".encode("ascii"),
+            build_static_headers(ext, length, last_modified),
+            self.connection_end,
         ]
+        with open(file_path, "rb") as f:
+            self.send_head_and_file(head, f, length, start)
+
+    def cork(self, on):
+        """Activa/desactiva TCP_CORK (solo Linux; en otros sistemas no hace nada)"""
+        if TCP_CORK is not None:
+            self.request.setsockopt(socket.IPPROTO_TCP, TCP_CORK, 1 if on else 0)
+
+    def send_head_and_file(self, head, f, size, offset=0):
+        """
+        Envía los headers (lista de fragmentos) y luego 'size' bytes del
+        archivo desde 'offset' con sendfile. Con TCP_CORK los headers y los primeros bytes del archivo
+        salen en segmentos llenos en lugar de un segmento pequeño solo con
+        los headers.
+        """
+        if size > SOCKET_BUFFER_SIZE:
+            self.request.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, LARGE_SEND_BUFFER_SIZE)
+        self.cork(True)
+        try:
+            self.send_parts(head)
+            self.send_file_body(f, size, offset)
+        finally:
+            self.cork(False)
+
+    def send_file_body(self, f, size, offset=0):
+        """
+        Envía 'size' bytes del archivo abierto 'f', desde 'offset', por el
+        socket.
         
-        response = "\r\n".join(headers) + "\r\n\r\n"
-        self.request.sendall(response.encode("utf-8"))
-        
+        Con sendfile(2) el kernel copia desde el page cache al socket, sin
+        pasar el archivo por memoria de Python. Se llama a os.sendfile
+        directamente (socket.sendfile crea un selector y hace fstat en cada
+        llamada); en Windows se lee y envía por bloques.
+        """
+        end = offset + size
+        if HAS_SENDFILE:
+            sock_fd = self.request.fileno()
+            file_fd = f.fileno()
+            while offset < end:
+                sent = os.sendfile(sock_fd, file_fd, offset, end - offset)
+                if not sent:
+                    break  # El archivo se truncó mientras se enviaba
+                offset += sent
+            return
+
+        f.seek(offset)
+        while offset < end:
+            chunk = f.read(min(FILE_CHUNK_SIZE, end - offset))
+            if not chunk:
+                break
+            self.request.sendall(chunk)
+            offset += len(chunk)
+
+    def send_json_bytes(self, content, include_body=True):
+        """Envía un JSON ya serializado usando la plantilla de headers"""
+        head = _JSON_HEAD_TMPL % (http_date_bytes(), len(content))
         if include_body:
-            self.request.sendall(content_bytes)
+            self.send_parts([head, self.connection_end, content])
+        else:
+            self.send_parts([head, self.connection_end])
 
     def send_metrics_json(self, include_body=True):
         """Envía métricas como JSON"""
-        with lock:
-            avg_time = total_response_time.value / request_count.value if request_count.value > 0 else 0
-            metrics = {
-                "mode": SERVER_MODE,
-                "port": PORT,
-                "requests": request_count.value,
-                "avg_time": round(avg_time, 4),
-                "total_time": round(total_response_time.value, 4)
-            }
-        self.send_json_response(metrics, include_body)
+        flush_metrics()
+        count, total_ns = read_metrics()
+        total = total_ns / 1e9
+        avg_time = total / count if count > 0 else 0
+        content = _METRICS_TMPL % (SERVER_MODE.encode("ascii"), PORT, count, avg_time, total)
+        self.send_json_bytes(content, include_body)
 
     def reset_metrics(self, include_body=True):
         """Resetea las métricas"""
-        with lock:
-            request_count.value = 0
-            total_response_time.value = 0.0
-        self.send_json_response({"status": "ok", "message": "Metrics reset"}, include_body)
+        clear_metrics()
+        self.send_json_bytes(_RESET_BODY, include_body)
 
     def send_server_info(self, include_body=True):
-        """Envía información del servidor"""
-        info = {
-            "mode": SERVER_MODE,
-            "port": PORT,
-            "host": HOST,
-            "server": SERVER_NAME,
-            "platform": platform.system(),
-            "forking_available": IS_UNIX_LIKE,
-            "pillow_available": PILLOW_AVAILABLE,
-            "image_processing": PILLOW_AVAILABLE,
-            "video_processing": True,  # Siempre disponible (usa hashlib)
-            "http_version": "HTTP/1.1",
-            "supported_methods": ["GET", "HEAD"]
-        }
-        self.send_json_response(info, include_body)
+        """Envía información del servidor (serializada al arrancar)"""
+        self.send_json_bytes(_info_body or build_server_info(), include_body)
 
     def send_error_response(self, code, message):
         """
-        Envía una respuesta de error HTTP con headers correctos (RFC 9110 Section 15)
+        Envía una respuesta de error HTTP con headers correctos (RFC 9110 Section 15).
+        Salvo 403/404, que son respuestas normales, se cierra la conexión:
+        tras una petición inválida no se sabe dónde empieza la siguiente.
         """
-        body = f"""<!DOCTYPE html>
-<html>
-<head><title>{code} {message}</title></head>
-<body>
-<h1>{code} {message}</h1>
-<hr>
-<p>{SERVER_NAME}</p>
-</body>
-</html>"""
-        body_bytes = body.encode("utf-8")
-        
-        headers = [
-            f"HTTP/1.1 {code} {message}",
-            f"Date: {self.get_http_date()}",
-            f"Server: {SERVER_NAME}",
-            "Content-Type: text/html; charset=utf-8",
-            f"Content-Length: {len(body_bytes)}",
-            "Access-Control-Allow-Origin: *",
-            "Connection: close",
-        ]
-        
-        response = "\r\n".join(headers) + "\r\n\r\n"
-        self.request.sendall(response.encode("utf-8") + body_bytes)
-
-    def get_content_type(self, file_path):
-        ext = file_path.suffix.lower()
-        types = {
-            ".html": "text/html; charset=utf-8",
-            ".css": "text/css; charset=utf-8",
-            ".js": "application/javascript; charset=utf-8",
-            ".json": "application/json; charset=utf-8",
-            ".png": "image/png",
-            ".jpg": "image/jpeg",
-            ".jpeg": "image/jpeg",
-            ".gif": "image/gif",
-            ".txt": "text/plain; charset=utf-8",
-            ".mp4": "video/mp4",
-            ".pdf": "application/pdf",
-        }
-        return types.get(ext, "application/octet-stream")
-
-    def update_metrics(self, elapsed):
-        with lock:
-            request_count.value += 1
-            total_response_time.value += elapsed
+        if code not in (403, 404):
+            self.close_connection = True
+            self.connection_end = _CLOSE_END
+        head, tail, body = _ERROR_RESPONSES.get((code, message)) or build_error_parts(code, message)
+        self.send_parts([head, http_date_bytes(), tail, self.connection_end, body])
+
+    def update_metrics(self, elapsed_ns):
+        add_metrics(elapsed_ns)
+
+    # Endpoints de la API: ruta -> método (un solo lookup en handle_get)
+    API_ROUTES = {
+        "/api/metrics": send_metrics_json,
+        "/api/reset": reset_metrics,
+        "/api/info": send_server_info,
+    }
+
+
+def build_server_info():
+    """Serializa la información del servidor para /api/info"""
+    info = {
+        "mode": SERVER_MODE,
+        "port": PORT,
+        "host": HOST,
+        "server": SERVER_NAME,
+        "platform": platform.system(),
+        "forking_available": IS_UNIX_LIKE,
+        "pillow_available": PILLOW_AVAILABLE,
+        "image_processing": PILLOW_AVAILABLE,
+        "video_processing": True,  # Siempre disponible (usa hashlib)
+        "http_version": "HTTP/1.1",
+        "supported_methods": ["GET", "HEAD"]
+    }
+    return json_bytes(info)
 
 
 def print_metrics():
     """Imprime métricas de rendimiento"""
-    with lock:
-        if request_count.value > 0:
-            avg_time = total_response_time.value / request_count.value
-            print(f"\n{'='*40}")
-            print(f"MÉTRICAS DE RENDIMIENTO - {SERVER_MODE.upper()}")
-            print(f"{'='*40}")
-            print(f"Total de requests: {request_count.value}")
-            print(f"Tiempo promedio: {avg_time:.4f}s")
-            print(f"Tiempo total: {total_response_time.value:.4f}s")
-            print(f"{'='*40}\n")
+    count, total_ns = read_metrics()
+    total = total_ns / 1e9
+    if count > 0:
+        avg_time = total / count
+        print(f"\n{'='*40}")
+        print(f"MÉTRICAS DE RENDIMIENTO - {SERVER_MODE.upper()}")
+        print(f"{'='*40}")
+        print(f"Total de requests: {count}")
+        print(f"Tiempo promedio: {avg_time:.4f}s")
+        print(f"Tiempo total: {total:.4f}s")
+        print(f"{'='*40}\n")
+
+
+def wait_readable(socks, timeout):
+    """
+    Espera hasta 'timeout' segundos a que alguno de 'socks' tenga datos
+    para leer (o se cierre); retorna los fds listos. Usa poll, que no
+    tiene el límite de descriptores de select (Windows solo tiene select).
+    """
+    if HAS_POLL:
+        poller = select.poll()
+        for sock in socks:
+            poller.register(sock, select.POLLIN)
+        return [fd for fd, _event in poller.poll(timeout * 1000)]
+    return [sock.fileno() for sock in select.select(socks, [], [], timeout)[0]]
+
+
+def close_expired(waiting, now, close):
+    """
+    Cierra con 'close' las conexiones del selector 'waiting' cuyo plazo
+    (data = (client_address, plazo)) ya pasó. Los sockets registrados sin
+    data (escucha, aviso) no se tocan.
+    """
+    for key in list(waiting.get_map().values()):
+        if key.data is not None and now > key.data[1]:
+            waiting.unregister(key.fileobj)
+            close(key.fileobj)
+
+
+def tune_listen_socket(sock):
+    """
+    Agranda SO_SNDBUF/SO_RCVBUF del socket de escucha. Debe llamarse antes
+    de listen() para que la ventana TCP anunciada ya tenga en cuenta el
+    buffer de recepción.
+    """
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+
+
+class TunedTCPServer(socketserver.TCPServer):
+    """
+    TCPServer con buffers de socket más grandes (ver tune_listen_socket)
+    y accept en lote: cada vez que el selector de serve_forever marca el
+    socket de escucha como listo se aceptan todas las conexiones
+    pendientes (hasta accept_batch), no solo una. Con muchas conexiones
+    simultáneas se ahorra una vuelta de select() por conexión.
+    """
+    allow_reuse_address = True
+    accept_batch = 64
+    # La cola por defecto de socketserver (5) rechaza conexiones en ráfagas
+    request_queue_size = 256
+
+    # Cada cuánto revisa keep_alive_allowed una conexión keep-alive inactiva
+    keep_alive_poll_interval = 0.5
+
+    def server_bind(self):
+        tune_listen_socket(self.socket)
+        super().server_bind()
+
+    def keep_alive_allowed(self):
+        """Si la respuesta en curso puede anunciar Connection: keep-alive"""
+        return True
+
+    def wait_keep_alive(self, conn):
+        """
+        Espera la siguiente petición de una conexión keep-alive, hasta
+        KEEP_ALIVE_TIMEOUT o hasta que keep_alive_allowed deje de
+        permitirlo. False si hay que cerrarla.
+        """
+        deadline = time.monotonic() + KEEP_ALIVE_TIMEOUT
+        while self.keep_alive_allowed():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if wait_readable([conn], min(remaining, self.keep_alive_poll_interval)):
+                return True
+        return False
+
+    def server_activate(self):
+        super().server_activate()
+        # No bloqueante: accept() avisa con EAGAIN cuando la cola se vacía
+        # (o cuando otro proceso ganó la conexión)
+        self.socket.setblocking(False)
+
+    def get_request(self):
+        conn, client_address = self.socket.accept()
+        conn.setblocking(True)
+        return conn, client_address
+
+    def _handle_request_noblock(self):
+        # Reemplaza la versión de socketserver, que acepta una sola conexión
+        for _ in range(self.accept_batch):
+            try:
+                request, client_address = self.get_request()
+            except OSError:
+                return  # Incluye BlockingIOError: no quedan conexiones
+            if self.verify_request(request, client_address):
+                try:
+                    self.process_request(request, client_address)
+                except Exception:
+                    self.handle_error(request, client_address)
+                    self.shutdown_request(request)
+                except:
+                    self.shutdown_request(request)
+                    raise
+            else:
+                self.shutdown_request(request)
+
+
+# Hilos del pool del modo threading y tamaño de pila de cada hilo
+THREAD_POOL_SIZE = min(256, max(32, 4 * (os.cpu_count() or 1)))
+THREAD_STACK_SIZE = 512 * 1024
+
+
+class ThreadPoolMixIn:
+    """
+    Como socketserver.ThreadingMixIn, pero cada conexión se atiende en un
+    pool fijo de hilos en lugar de crear un hilo nuevo por conexión: sin
+    el costo de crear el hilo en cada petición y con la memoria acotada
+    bajo carga.
+
+    Una conexión solo ocupa un hilo del pool mientras tiene una petición
+    que atender: recién aceptada, o inactiva entre peticiones keep-alive,
+    espera en un selector atendido por un hilo aparte, que la pasa al pool
+    cuando llegan datos y la cierra si no llegan a tiempo (REQUEST_TIMEOUT
+    o KEEP_ALIVE_TIMEOUT). Así los clientes silenciosos (p. ej.
+    preconexiones del navegador) no dejan sin hilos a los demás.
+    """
+    pool_size = THREAD_POOL_SIZE
+
+    def server_activate(self):
+        super().server_activate()
+        self.start_pool()
+
+    def start_pool(self):
+        """Crea el pool de hilos y el hilo que vigila las conexiones inactivas"""
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.pool_size, thread_name_prefix="http-worker"
+        )
+        self._closing = False
+        # Conexiones sin petición en curso: data = (client_address, plazo)
+        self._waiting = selectors.DefaultSelector()
+        # epoll y kqueue ven los fds registrados durante select(); con
+        # select/poll (Windows) hay que despertar al hilo para que los vea
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_needed = not (hasattr(select, "epoll") or hasattr(select, "kqueue"))
+        self._waiting.register(self._wake_r, selectors.EVENT_READ)
+        self._waiting_thread = threading.Thread(
+            target=self._serve_waiting, name="http-waiting", daemon=True
+        )
+        self._waiting_thread.start()
+
+    def keep_alive_allowed(self):
+        return not self._closing
+
+    def wait_keep_alive(self, conn):
+        # La espera se hace en el selector (ver _serve_waiting), sin ocupar
+        # un hilo del pool
+        return False
+
+    def finish_request(self, request, client_address):
+        return self.RequestHandlerClass(request, client_address, self)
+
+    def process_request_thread(self, request, client_address):
+        """
+        Atiende la conexión; si queda abierta (keep-alive) vuelve al
+        selector en lugar de cerrarse
+        """
+        try:
+            handler = self.finish_request(request, client_address)
+            if not handler.close_connection and not self._closing:
+                self._park(request, client_address, KEEP_ALIVE_TIMEOUT)
+                return
+        except Exception:
+            self.handle_error(request, client_address)
+        self.shutdown_request(request)
+
+    def process_request(self, request, client_address):
+        self._park(request, client_address, REQUEST_TIMEOUT)
+
+    def _park(self, request, client_address, timeout):
+        """Deja la conexión en el selector hasta que tenga datos o pase 'timeout'"""
+        self._waiting.register(request, selectors.EVENT_READ, (client_address, time.monotonic() + timeout))
+        if self._wake_needed:
+            self._wake_w.send(b"\0")
+
+    def _serve_waiting(self):
+        """
+        Hilo que pasa al pool las conexiones cuando tienen datos y cierra
+        las que pasan su plazo sin enviar nada
+        """
+        interval = self.keep_alive_poll_interval
+        next_sweep = time.monotonic() + interval
+        while not self._closing:
+            for key, _events in self._waiting.select(interval):
+                if key.fileobj is self._wake_r:
+                    self._wake_r.recv(4096)
+                    continue
+                self._waiting.unregister(key.fileobj)
+                self._pool.submit(self.process_request_thread, key.fileobj, key.data[0])
+
+            now = time.monotonic()
+            if now >= next_sweep:
+                next_sweep = now + interval
+                close_expired(self._waiting, now, self.shutdown_request)
+
+    def server_close(self):
+        # Las conexiones inactivas se cierran en vez de esperar su plazo
+        self._closing = True
+        super().server_close()
+        self._waiting_thread.join()
+        # Con _closing ningún hilo del pool vuelve a usar el selector
+        self._pool.shutdown(wait=True)
+        for key in list(self._waiting.get_map().values()):
+            if key.data is not None:
+                self.shutdown_request(key.fileobj)
+        self._waiting.close()
+        self._wake_r.close()
+        self._wake_w.close()
 
 
 # Threading version
-class ThreadedHTTPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+class ThreadedHTTPServer(ThreadPoolMixIn, TunedTCPServer):
     allow_reuse_address = True
 
 
@@ -601,36 +1662,360 @@ ForkingHTTPServer = None
 
 if IS_UNIX_LIKE:
     try:
-        class ForkingHTTPServer(socketserver.ForkingMixIn, socketserver.TCPServer):
+        class ForkingHTTPServer(socketserver.ForkingMixIn, TunedTCPServer):
             allow_reuse_address = True
+
+            # Cada conexión keep-alive retiene un hijo: con max_children
+            # hijos vivos el padre se bloquea en waitpid en lugar de
+            # aceptar. Estos métodos corren en el hijo, con la copia de
+            # active_children del momento del fork (sin contarse a sí mismo)
+
+            def keep_alive_allowed(self):
+                return (len(self.active_children or ()) + 1 < self.max_children
+                        and not wait_readable([self.socket], 0))
+
+            def wait_keep_alive(self, conn):
+                # Si llegan conexiones nuevas, se libera el hijo
+                return conn.fileno() in wait_readable([conn, self.socket], KEEP_ALIVE_TIMEOUT)
         FORKING_AVAILABLE = True
     except AttributeError:
         FORKING_AVAILABLE = False
         ForkingHTTPServer = None
 
 
+# Prefork: procesos de larga vida en lugar de un fork por conexión (Unix only)
+PREFORK_AVAILABLE = IS_UNIX_LIKE and hasattr(os, "fork")
+PREFORK_WORKERS = max(2, os.cpu_count() or 1)
+
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+class PreforkHTTPServer(TunedTCPServer):
+    """
+    Servidor con un pool fijo de procesos worker.
+    
+    Con SO_REUSEPORT (Linux, BSD) el padre solo reserva el puerto y cada
+    uno de los PREFORK_WORKERS hijos abre su propio socket de escucha en
+    ese puerto: el kernel reparte las conexiones entre las colas de accept
+    de cada worker, sin que compitan por un único socket. Sin
+    SO_REUSEPORT el padre escucha y los hijos comparten ese socket.
+    A diferencia de ForkingMixIn no hay un fork() por petición.
+
+    Cada worker atiende en un solo hilo, con un selector que reúne su
+    socket de escucha y sus conexiones inactivas (recién aceptadas o entre
+    peticiones keep-alive): solo atiende la conexión que ya envió datos,
+    así un cliente silencioso no bloquea al worker ni a las conexiones
+    que el kernel le asignó.
+    El padre espera a los hijos, vuelve a crear los que terminan de forma
+    inesperada y los termina al detenerse.
+    """
+    allow_reuse_address = True
+    reuse_port = hasattr(socket, "SO_REUSEPORT")
+    workers = PREFORK_WORKERS
+    # Cada worker atiende en un único hilo de larga vida: las métricas se
+    # publican en service_actions, tras cada vuelta del selector
+    batch_metrics = True
+    # Un worker que muere antes de esto tras crearse se recrea con pausa,
+    # para no entrar en un bucle de fork si falla al arrancar
+    respawn_delay = 1.0
+
+    def __init__(self, server_address, RequestHandlerClass):
+        super().__init__(server_address, RequestHandlerClass)
+        self._children = {}  # pid -> instante del fork
+
+    def server_bind(self):
+        if self.reuse_port:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+    def server_activate(self):
+        # Con SO_REUSEPORT el socket del padre queda enlazado pero sin
+        # listen(): el kernel no le asigna conexiones
+        if not self.reuse_port:
+            super().server_activate()
+
+    def _open_worker_socket(self):
+        """En un hijo: reemplaza el socket heredado por un listener propio"""
+        sock = socket.socket(self.address_family, self.socket_type)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        tune_listen_socket(sock)
+        sock.bind(self.server_address)
+        self.socket.close()
+        self.socket = sock
+        TunedTCPServer.server_activate(self)
+
+    def _spawn_worker(self, poll_interval):
+        """Crea un proceso worker (en el padre)"""
+        sys.stdout.flush()
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker(poll_interval)
+        self._children[pid] = time.monotonic()
+
+    def serve_forever(self, poll_interval=0.5):
+        # El socket es no bloqueante (TunedTCPServer): sin SO_REUSEPORT el
+        # worker que pierde la carrera por una conexión vuelve al select en
+        # lugar de bloquearse en accept()
+        for _ in range(self.workers):
+            self._spawn_worker(poll_interval)
+
+        # SIGTERM (p. ej. desde benchmark_server) se trata como Ctrl+C
+        signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+        while self._children:
+            pid, status = os.wait()
+            started = self._children.pop(pid, None)
+            if started is None:
+                continue
+            # Código 0: el worker se detuvo por Ctrl+C; cualquier otra salida
+            # (excepción, señal, OOM killer) deja un hueco en el puerto
+            code = os.waitstatus_to_exitcode(status)
+            if code != 0:
+                print(f"[prefork] Worker {pid} terminó inesperadamente (código {code}); se crea otro")
+                if time.monotonic() - started < self.respawn_delay:
+                    time.sleep(self.respawn_delay)
+                self._spawn_worker(poll_interval)
+
+    def _run_worker(self, poll_interval):
+        """Bucle de un proceso hijo; nunca retorna"""
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        exit_code = 0
+        try:
+            if self.reuse_port:
+                self._open_worker_socket()
+            self._serve_worker(poll_interval)
+        except KeyboardInterrupt:
+            pass
+        except Exception as e:
+            print(f"[prefork] Error en worker {os.getpid()}: {e}")
+            exit_code = 1
+        finally:
+            flush_metrics()
+            sys.stdout.flush()
+            os._exit(exit_code)
+
+    def _serve_worker(self, poll_interval):
+        """
+        Bucle del worker: acepta conexiones cuando el socket de escucha
+        está listo y atiende la conexión que tenga datos. Las conexiones
+        sin datos se cierran al pasar su plazo.
+        """
+        self._waiting = selectors.DefaultSelector()
+        self._waiting.register(self.socket, selectors.EVENT_READ)
+        next_sweep = time.monotonic() + poll_interval
+        while True:
+            for key, _events in self._waiting.select(poll_interval):
+                if key.fileobj is self.socket:
+                    self._handle_request_noblock()
+                else:
+                    self._waiting.unregister(key.fileobj)
+                    self._serve_connection(key.fileobj, key.data[0])
+            self.service_actions()
+
+            now = time.monotonic()
+            if now >= next_sweep:
+                next_sweep = now + poll_interval
+                close_expired(self._waiting, now, self.shutdown_request)
+
+    def process_request(self, request, client_address):
+        # La conexión espera en el selector hasta que envíe la petición
+        self._park(request, client_address, REQUEST_TIMEOUT)
+
+    def _park(self, request, client_address, timeout):
+        self._waiting.register(request, selectors.EVENT_READ, (client_address, time.monotonic() + timeout))
+
+    def finish_request(self, request, client_address):
+        return self.RequestHandlerClass(request, client_address, self)
+
+    def _serve_connection(self, request, client_address):
+        """Atiende las peticiones que la conexión ya envió; si sigue abierta vuelve al selector"""
+        try:
+            handler = self.finish_request(request, client_address)
+            if not handler.close_connection:
+                self._park(request, client_address, KEEP_ALIVE_TIMEOUT)
+                return
+        except Exception:
+            self.handle_error(request, client_address)
+        self.shutdown_request(request)
+
+    def wait_keep_alive(self, conn):
+        # La espera se hace en el selector del worker (ver _serve_worker)
+        return False
+
+    def service_actions(self):
+        # _serve_worker la llama tras cada vuelta del selector
+        flush_metrics()
+
+    def shutdown(self):
+        """Termina los workers (solo se llama en el padre)"""
+        for pid in self._children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in self._children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        self._children = {}
+
+
+class AsyncioHTTPServer:
+    """
+    Servidor con un event loop asyncio (uvloop si está instalado).
+    
+    El loop acepta las conexiones y espera a que llegue la petición sin
+    ocupar ningún hilo; recién entonces el HTTPRequestHandler (el mismo
+    que usan los modos socketserver) se ejecuta en un pool de hilos
+    acotado. Así las conexiones lentas o inactivas no consumen hilos y
+    no se crea un hilo por conexión. Entre peticiones de una conexión
+    keep-alive la espera también vuelve al loop.
+    """
+    max_workers = 64
+    request_queue_size = 1024
+
+    def __init__(self, server_address, RequestHandlerClass):
+        self.server_address = server_address
+        self.RequestHandlerClass = RequestHandlerClass
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        tune_listen_socket(self.socket)
+        self.socket.bind(server_address)
+        self.socket.listen(self.request_queue_size)
+        self.socket.setblocking(False)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+    def serve_forever(self):
+        loop = uvloop.new_event_loop() if UVLOOP_AVAILABLE else asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self._accept_loop())
+        finally:
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.close()
+
+    async def _accept_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            conn, client_address = await loop.sock_accept(self.socket)
+            loop.create_task(self._dispatch(conn, client_address))
+
+    async def _wait_readable(self, fd, timeout):
+        """True cuando 'fd' tiene datos para leer; False si pasa 'timeout'"""
+        loop = asyncio.get_running_loop()
+        readable = loop.create_future()
+
+        def on_readable():
+            if not readable.done():
+                readable.set_result(None)
+
+        loop.add_reader(fd, on_readable)
+        try:
+            await asyncio.wait_for(readable, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            loop.remove_reader(fd)
+
+    async def _dispatch(self, conn, client_address):
+        """
+        Espera a que el cliente envíe datos y pasa la conexión al pool;
+        si queda abierta (keep-alive) vuelve a esperar la siguiente
+        petición hasta KEEP_ALIVE_TIMEOUT
+        """
+        loop = asyncio.get_running_loop()
+        fd = conn.fileno()
+        # Un cliente que conecta y no envía nada no retiene su fd ni su tarea
+        timeout = REQUEST_TIMEOUT
+        try:
+            while await self._wait_readable(fd, timeout):
+                # El handler usa llamadas bloqueantes (recv/sendall)
+                conn.setblocking(True)
+                if not await loop.run_in_executor(self._executor, self.process_request, conn, client_address):
+                    return  # process_request ya cerró la conexión
+                timeout = KEEP_ALIVE_TIMEOUT
+        except asyncio.CancelledError:
+            conn.close()
+            raise
+        conn.close()
+
+    def process_request(self, request, client_address):
+        """Atiende la conexión; True si queda abierta esperando otra petición"""
+        keep_open = False
+        try:
+            handler = self.RequestHandlerClass(request, client_address, self)
+            keep_open = not handler.close_connection
+        except Exception as e:
+            print(f"[Error] {client_address[0]}: {e}")
+        finally:
+            if not keep_open:
+                try:
+                    request.shutdown(socket.SHUT_WR)
+                except OSError:
+                    pass
+                request.close()
+        return keep_open
+
+    def keep_alive_allowed(self):
+        return True
+
+    def wait_keep_alive(self, conn):
+        # La espera se hace en el event loop (ver _dispatch), sin ocupar
+        # un hilo del pool
+        return False
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def server_close(self):
+        self.socket.close()
+
+
 def run_server(port, mode):
     """Ejecuta el servidor en el puerto y modo especificado"""
-    global PORT, SERVER_MODE
+    global PORT, SERVER_MODE, _info_body
 
     PORT = port
     SERVER_MODE = mode
 
+    # Pilas de 512 KB para los hilos que se creen desde aquí (pool de
+    # threading y asyncio) en lugar de los 8 MB por defecto
+    threading.stack_size(THREAD_STACK_SIZE)
+
     # Resetear métricas
-    with lock:
-        request_count.value = 0
-        total_response_time.value = 0.0
+    clear_metrics()
+
+    # Cargar los archivos pequeños antes de aceptar conexiones
+    prewarm_static_cache()
 
     if mode == "threading":
         server = ThreadedHTTPServer((HOST, port), HTTPRequestHandler)
     elif mode == "forking" and FORKING_AVAILABLE:
         server = ForkingHTTPServer((HOST, port), HTTPRequestHandler)
+    elif mode == "prefork" and PREFORK_AVAILABLE:
+        server = PreforkHTTPServer((HOST, port), HTTPRequestHandler)
+    elif mode == "asyncio":
+        server = AsyncioHTTPServer((HOST, port), HTTPRequestHandler)
     else:
         print(f"Modo {mode} no disponible, usando threading")
         server = ThreadedHTTPServer((HOST, port), HTTPRequestHandler)
         SERVER_MODE = "threading"
 
-    print(f"Servidor {SERVER_MODE} iniciado en puerto {port}")
+    # Modo y puerto ya son definitivos: /api/info queda fijo
+    _info_body = build_server_info()
+
+    if SERVER_MODE == "asyncio" and UVLOOP_AVAILABLE:
+        print(f"Servidor {SERVER_MODE} (uvloop) iniciado en puerto {port}")
+    elif SERVER_MODE == "prefork":
+        print(f"Servidor {SERVER_MODE} ({server.workers} workers) iniciado en puerto {port}")
+    else:
+        print(f"Servidor {SERVER_MODE} iniciado en puerto {port}")
 
     try:
         server.serve_forever()
@@ -640,6 +2025,7 @@ def run_server(port, mode):
     finally:
         server.shutdown()
         server.server_close()
+        shutdown_image_pool()
 
 
 def show_menu():
@@ -670,6 +2056,7 @@ def get_menu_choice():
 def start_benchmark_mode():
     """Inicia el modo benchmark con ambos servidores"""
     import subprocess
+    from benchmark_server import wait_for_server
 
     print("\nIniciando modo benchmark...")
     print("Threading: http://localhost:8080")
@@ -682,18 +2069,26 @@ def start_benchmark_mode():
     # Servidor Threading
     threading_proc = subprocess.Popen(
         [sys.executable, __file__, "8080", "threading"],
-        cwd=os.getcwd()
+        cwd=os.getcwd(),
+        start_new_session=True,
+        close_fds=True
     )
-    processes.append(threading_proc)
+    processes.append((threading_proc, 8080))
 
     # Servidor Forking (solo Unix)
     if IS_UNIX_LIKE:
-        time.sleep(0.5)
         forking_proc = subprocess.Popen(
             [sys.executable, __file__, "8081", "forking"],
-            cwd=os.getcwd()
+            cwd=os.getcwd(),
+            start_new_session=True,
+            close_fds=True
         )
-        processes.append(forking_proc)
+        processes.append((forking_proc, 8081))
+
+    # Esperar a que ambos acepten conexiones (arrancan en paralelo)
+    for proc, port in processes:
+        if not wait_for_server(port, proc=proc):
+            print(f"ADVERTENCIA: el servidor del puerto {port} no respondió")
 
     print("\nServidores iniciados. Abre http://localhost:8080 en tu navegador.")
 
@@ -702,7 +2097,7 @@ def start_benchmark_mode():
             time.sleep(1)
     except KeyboardInterrupt:
         print("\n\nDeteniendo servidores...")
-        for proc in processes:
+        for proc, port in processes:
             proc.terminate()
             proc.wait()
         print("Servidores detenidos.")
@@ -6,6 +6,7 @@
 const BENCHMARK_PORT = 8082;
 const THREADING_PORT = 8080;
 const FORKING_PORT = 8081;
+const PIPELINE_DEPTH = 16;
 
 let pollingInterval = null;
 
@@ -87,12 +88,14 @@ function displayResults(results) {
         const t = results.threading;
         document.getElementById('resultThreadingReqs').textContent = `${t.successful}/${t.total_requests}`;
         document.getElementById('resultThreadingAvg').textContent = `${(t.avg_time * 1000).toFixed(2)} ms`;
+        document.getElementById('resultThreadingP95').textContent = `${(t.p95_time * 1000).toFixed(2)} ms`;
         document.getElementById('resultThreadingTotal').textContent = `${t.total_time.toFixed(3)} s`;
         document.getElementById('threadingRequests').textContent = t.successful;
         document.getElementById('threadingAvg').textContent = t.avg_time.toFixed(4);
     } else {
         document.getElementById('resultThreadingReqs').textContent = '-';
         document.getElementById('resultThreadingAvg').textContent = '-';
+        document.getElementById('resultThreadingP95').textContent = '-';
         document.getElementById('resultThreadingTotal').textContent = '-';
     }
     
@@ -101,12 +104,14 @@ function displayResults(results) {
         const f = results.forking;
         document.getElementById('resultForkingReqs').textContent = `${f.successful}/${f.total_requests}`;
         document.getElementById('resultForkingAvg').textContent = `${(f.avg_time * 1000).toFixed(2)} ms`;
+        document.getElementById('resultForkingP95').textContent = `${(f.p95_time * 1000).toFixed(2)} ms`;
         document.getElementById('resultForkingTotal').textContent = `${f.total_time.toFixed(3)} s`;
         document.getElementById('forkingRequests').textContent = f.successful;
         document.getElementById('forkingAvg').textContent = f.avg_time.toFixed(4);
     } else {
         document.getElementById('resultForkingReqs').textContent = '-';
         document.getElementById('resultForkingAvg').textContent = '-';
+        document.getElementById('resultForkingP95').textContent = '-';
         document.getElementById('resultForkingTotal').textContent = '-';
     }
     
@@ -118,8 +123,13 @@ function displayResults(results) {
         document.getElementById('diffTotal').textContent = 
             `Threading: ${c.threading_rps} req/s | Forking: ${c.forking_rps} req/s`;
         document.getElementById('diffReqs').textContent = 'Completado';
+        if (results.threading.p95_time !== undefined && results.forking.p95_time !== undefined) {
+            const p95Winner = results.threading.p95_time <= results.forking.p95_time ? 'Threading' : 'Forking';
+            document.getElementById('diffP95').textContent = `${p95Winner} menor latencia de cola`;
+        }
     } else {
         document.getElementById('diffAvg').textContent = '-';
+        document.getElementById('diffP95').textContent = '-';
         document.getElementById('diffTotal').textContent = '-';
         document.getElementById('diffReqs').textContent = '-';
     }
@@ -162,6 +172,12 @@ async function pollBenchmarkResults() {
                 } else {
                     addLog('Benchmark completado', 'success');
                 }
+
+                // Sugerencias del servidor (p. ej. puertos efímeros agotados)
+                const hints = new Set([results.threading, results.forking]
+                    .filter(r => r && r.hint)
+                    .map(r => r.hint));
+                hints.forEach(hint => addLog(hint, 'error'));
             }
             
             return results;
@@ -180,6 +196,8 @@ async function runBenchmark() {
     const file = document.getElementById('benchmarkFile').value;
     const count = parseInt(document.getElementById('benchmarkCount').value);
     const parallel = document.getElementById('benchmarkParallel')?.checked !== false;
+    const keepAlive = document.getElementById('benchmarkKeepAlive')?.checked !== false;
+    const pipeline = document.getElementById('benchmarkPipeline')?.checked === true ? PIPELINE_DEPTH : 0;
     const processImage = document.getElementById('benchmarkProcess')?.checked === true;
 
     // Verificar que se seleccionó un archivo procesable
@@ -199,7 +217,12 @@ async function runBenchmark() {
     btn.textContent = 'Ejecutando...';
 
     const modeDesc = processImage ? 'con procesamiento CPU' : 'I/O estándar';
-    addLog(`Iniciando benchmark: ${count} peticiones ${parallel ? 'paralelas' : 'secuenciales'} (${modeDesc})`, 'info');
+    addLog(`Iniciando benchmark: ${count} peticiones ${parallel ? 'paralelas' : 'secuenciales'} (${modeDesc}, ${keepAlive ? 'keep-alive' : 'Connection: close'})`, 'info');
+    if (pipeline && parallel) {
+        addLog(`Pipelining activo: lotes de ${pipeline} peticiones por conexión`, 'info');
+    } else if (pipeline) {
+        addLog('Pipelining secuencial: una conexión, latencia medida hasta el primer byte', 'info');
+    }
     
     if (processImage) {
         if (file.match(/\.(mp4|avi|mov|mkv)$/i)) {
@@ -216,7 +239,7 @@ async function runBenchmark() {
 
     try {
         // Llamar al endpoint de benchmark
-        const url = `http://localhost:${BENCHMARK_PORT}/api/benchmark/run?file=${encodeURIComponent(file)}&requests=${count}&parallel=${parallel}&process=${processImage}`;
+        const url = `http://localhost:${BENCHMARK_PORT}/api/benchmark/run?file=${encodeURIComponent(file)}&requests=${count}&parallel=${parallel}&keepalive=${keepAlive}&pipeline=${pipeline}&process=${processImage}`;
         
         const response = await fetch(url, {
             mode: 'cors',
@@ -247,8 +270,9 @@ async function resetAll() {
     const fields = [
         'resultThreadingReqs', 'resultForkingReqs',
         'resultThreadingAvg', 'resultForkingAvg',
+        'resultThreadingP95', 'resultForkingP95',
         'resultThreadingTotal', 'resultForkingTotal',
-        'diffReqs', 'diffAvg', 'diffTotal'
+        'diffReqs', 'diffAvg', 'diffP95', 'diffTotal'
     ];
     fields.forEach(id => {
         document.getElementById(id).textContent = '-';